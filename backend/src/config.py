@@ -1,36 +1,77 @@
-from pydantic_settings import BaseSettings
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# backend/.env, whatever the working directory; real environment variables
+# take precedence. Every settings group reads the same file, so keys meant
+# for the other groups are ignored.
+_SETTINGS_CONFIG = SettingsConfigDict(
+    env_file=Path(__file__).resolve().parent.parent / ".env", extra="ignore"
+)
+
+
+class OpenRouterSettings(BaseSettings):
+    model_config = _SETTINGS_CONFIG
+
+    OPENROUTER_API_KEY: str | None = None
+    OPENROUTER_EMBED_MODEL: str = "qwen/qwen3-embedding-8b"
+    OPENROUTER_EMBED_URL: str | None = None
+    OPENROUTER_EMBED_BATCH_SIZE: int = 64
+    OPENROUTER_EMBED_CONCURRENCY: int = 4
+    OPENROUTER_EMBED_QUERY_CACHE_SIZE: int = 1024
+    OPENROUTER_HTTP_REFERER: str | None = None
+    OPENROUTER_APP_TITLE: str | None = None
+    OPENROUTER_TIMEOUT_SECONDS: float = 30.0
+    OPENROUTER_CHAT_MODEL: str = "qwen/qwen3-235b-a22b-2507"
+    OPENROUTER_CHAT_URL: str | None = None
+    OPENROUTER_CHAT_TIMEOUT_SECONDS: float = 60.0
+    OPENROUTER_CHAT_DEFAULT_TEMPERATURE: float = 0.2
+    OPENROUTER_CHAT_DEFAULT_TOP_P: float = 0.9
+    OPENROUTER_CHAT_DEFAULT_MAX_TOKENS: int = 1200
+    # Mark the leading system prompt with cache_control so providers that
+    # support prompt caching (Anthropic, Gemini) reuse its prefill.
+    OPENROUTER_CHAT_PROMPT_CACHE: bool = True
+
+
+class MinioSettings(BaseSettings):
+    model_config = _SETTINGS_CONFIG
+
+    MINIO_ENDPOINT: str | None = None
+    MINIO_ACCESS_KEY: str | None = None
+    MINIO_SECRET_KEY: str | None = None
+    MINIO_BUCKET_NAME: str = "documents"
+    MINIO_REGION: str | None = None
+    MINIO_PUBLIC_ENDPOINT: str | None = None
+    MINIO_USE_SSL: bool = False
 
 
 class Settings(BaseSettings):
+    model_config = _SETTINGS_CONFIG
+
     APP_NAME: str = "finance"
     SECRET_KEY: str = "dev-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_HOURS: int = 24
     ADMIN_SECRET_KEY: str = "dev-admin-secret-change-in-production"
+    BCRYPT_ROUNDS: int = 10
 
     DB_NAME: str = "finance"
     DB_HOST: str = "localhost"
     DB_PORT: int = 5432
     DB_USER: str = "postgres"
     DB_PASSWORD: str = "postgres"
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 512
+    DB_LOG_QUERY_COUNTS: bool = False
 
     LOG_LEVEL: str = "INFO"
     JSON_LOGS: bool = False
     ADD_BASE_ADMIN: bool = False
 
-    OPENROUTER_API_KEY: str | None
-    OPENROUTER_EMBED_MODEL: str = "qwen/qwen3-embedding-8b"
-    OPENROUTER_EMBED_URL: str | None = None
-    OPENROUTER_HTTP_REFERER: str | None = None
-    OPENROUTER_APP_TITLE: str | None = None
-    OPENROUTER_TIMEOUT_SECONDS: float = 30.0
-    OPENROUTER_CHAT_MODEL: str = "qwen/qwen3-235b-a22b-2507"
-    OPENROUTER_CHAT_URL: str | None = None
-    OPENROUTER_CHAT_TIMEOUT_SECONDS: float = 60.0
-    OPENROUTER_CHAT_DEFAULT_TEMPERATURE: float = 0.2
-    OPENROUTER_CHAT_DEFAULT_TOP_P: float = 0.9
-    OPENROUTER_CHAT_DEFAULT_MAX_TOKENS: int = 1200
-
     RAG_MESSAGES_LIMIT: int = 20
     RAG_MAX_CONTEXT_CHARS: int = 50_000
     RAG_DEFAULT_TOP_K: int = 8
@@ -66,28 +107,48 @@ class Settings(BaseSettings):
     RAG_KB_LIMIT: int = 6
     RAG_KB_SCORE_THRESHOLD: float | None = 0.68
 
+    # Reuse an answer for a near-identical question in the same chat state.
+    # Off by default (TTL 0): close finance questions embed alike, and every
+    # turn pays an extra embedding call while it is on.
+    RAG_SEMANTIC_CACHE_TTL_SECONDS: int = 0
+    RAG_SEMANTIC_CACHE_THRESHOLD: float = 0.93
+    RAG_SEMANTIC_CACHE_MAX_ENTRIES: int = 1024
+
     CBR_API_BASE_URL: str = "https://cbr.ru/DailyInfoWebServ/DailyInfo.asmx"
     CBR_CACHE_TTL_SECONDS: int = 900
-    TAVILY_API_KEY: str | None = "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"
+    CBR_CACHE_MAX_ENTRIES: int = 256
+    CBR_KEY_RATE_BACKGROUND_REFRESH: bool = False
+    TAVILY_API_KEY: str | None = None
     TAVILY_BASE_URL: str = "https://api.tavily.com/search"
     TAVILY_TIMEOUT_SECONDS: float = 8.0
     TAVILY_CACHE_TTL_SECONDS: int = 300
+    TAVILY_CACHE_MAX_ENTRIES: int = 1024
 
-    QDRANT_URL: str | None = "http://178.72.149.75:6333"
+    QDRANT_URL: str | None = None
     QDRANT_COLLECTION_NAME: str = "document_chunks"
     QDRANT_BATCH_SIZE: int = 64
 
-    MINIO_ENDPOINT: str | None = "http://178.72.149.75:9000"
-    MINIO_ACCESS_KEY: str | None = "minioadmin"
-    MINIO_SECRET_KEY: str | None = "minioadmin"
-    MINIO_BUCKET_NAME: str = "documents"
-    MINIO_REGION: str | None = None
-    MINIO_PUBLIC_ENDPOINT: str | None = "http://178.72.149.75:9001"
-    MINIO_USE_SSL: bool = False
+    # Worker processes for PDF text extraction; 0 extracts in the caller's thread.
+    PARSER_PROCESS_WORKERS: int = 2
+    # Threads reserved for document parsing, apart from asyncio.to_thread's pool.
+    PARSER_THREAD_WORKERS: int = 4
+
+    @cached_property
+    def openrouter(self) -> OpenRouterSettings:
+        return OpenRouterSettings()
+
+    @cached_property
+    def minio(self) -> MinioSettings:
+        return MinioSettings()
 
-    @property
-    def db_url(self):
+    @cached_property
+    def db_url(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
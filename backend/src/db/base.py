@@ -1,7 +1,9 @@
-from typing import Annotated
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Annotated, Iterator
 
 import structlog
-from sqlalchemy import Integer
+from sqlalchemy import Integer, event
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, mapped_column
 
@@ -21,11 +23,44 @@ def create_db_engine(db_url, **kwargs):
     return create_async_engine(url=db_url, **kwargs)
 
 
-engine = create_db_engine(settings.db_url)
+engine = create_db_engine(
+    settings.db_url,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    query_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+    connect_args={
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    },
+)
 
 session_factory = async_sessionmaker(bind=engine)
 
 
+_executed_queries: ContextVar[list[str] | None] = ContextVar(
+    "executed_queries", default=None
+)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    if (queries := _executed_queries.get()) is not None:
+        queries.append(statement)
+
+
+@contextmanager
+def count_queries() -> Iterator[list[str]]:
+    """Collect the SQL statements executed in the current context."""
+    queries: list[str] = []
+    token = _executed_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _executed_queries.reset(token)
+
+
 async def create_tables():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -1,7 +1,11 @@
 import enum
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
-from passlib.context import CryptContext
+import bcrypt
 from sqlalchemy import (
     String,
     TypeDecorator,
@@ -13,30 +17,80 @@ from sqlalchemy import (
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import Mapped, mapped_column, synonym, relationship
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+    reconstructor,
+    relationship,
+    synonym,
+    validates,
+)
 from sqlalchemy import func
 
+from config import settings
 from db.base import Base, int_pk
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes are plain bcrypt ($2b$) checked directly via the bcrypt package;
+# passlib is kept only to verify legacy $bcrypt-sha256$ hashes and is not
+# imported until one shows up.
+@functools.cache
+def _legacy_ctx():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+
+
+# bcrypt only looks at the first 72 bytes; longer passwords are rejected
+# rather than silently truncated, so two of them cannot share a hash.
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+# Successful verifications keyed by (hash, sha256(plain)), so repeated logins
+# with the same credentials skip the bcrypt key schedule.
+_VERIFY_CACHE_SIZE = 4096
+_verified: OrderedDict[tuple[bytes, bytes], None] = OrderedDict()
+_verified_lock = threading.Lock()
+
+
+def _verify_password(plain_password: str, hashed_password: bytes) -> bool:
+    key = (hashed_password, hashlib.sha256(plain_password.encode()).digest())
+    with _verified_lock:
+        if key in _verified:
+            _verified.move_to_end(key)
+            return True
+
+    if hashed_password.startswith(b"$2"):
+        password = plain_password.encode()
+        if len(password) > BCRYPT_MAX_PASSWORD_BYTES:
+            return False
+        ok = bcrypt.checkpw(password, hashed_password)
+    else:
+        ok = _legacy_ctx().verify(plain_password, hashed_password)
+    if not ok:
+        return False
+
+    with _verified_lock:
+        _verified[key] = None
+        if len(_verified) > _VERIFY_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return True
 
 
 class IntEnum(TypeDecorator):
     impl = Integer
+    cache_ok = True
 
     def __init__(self, enumtype, *args, **kwargs):
         super(IntEnum, self).__init__(*args, **kwargs)
-        self._enumtype = enumtype
+        # Public so it becomes part of the statement cache key.
+        self.enumtype = enumtype
+        self._members = enumtype._value2member_map_
 
     def process_bind_param(self, value, dialect):
-        if isinstance(value, int):
-            return value
-
-        return value.value
+        return None if value is None else int(value)
 
     def process_result_value(self, value, dialect):
-        return self._enumtype(value)
+        return None if value is None else self._members[value]
 
 
 class Role(enum.IntEnum):
@@ -57,7 +111,7 @@ class User(Base):
     email: Mapped[str] = mapped_column(String(100), unique=True, index=True)
     hashed_password: Mapped[str] = mapped_column(String(100))
     role: Mapped[Role] = mapped_column(IntEnum(Role), default=Role.USER)
-    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
 
     id: Mapped[int] = synonym("user_id")
 
@@ -71,12 +125,29 @@ class User(Base):
         "ParsedDocument", back_populates="user"
     )
 
+    # The encoded hash is snapshotted on load and on assignment so the login
+    # path does not go through the instrumented attribute every time.
+    @reconstructor
+    def _init_on_load(self) -> None:
+        self._hashed_bytes = self.hashed_password.encode()
+
+    @validates("hashed_password")
+    def _snapshot_hash(self, key: str, value: str) -> str:
+        self._hashed_bytes = value.encode()
+        return value
+
     def verify_password(self, plain_password: str) -> bool:
-        return pwd_context.verify(plain_password, self.hashed_password)
+        return _verify_password(plain_password, self._hashed_bytes)
 
     @staticmethod
     def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+        encoded = password.encode()
+        if len(encoded) > BCRYPT_MAX_PASSWORD_BYTES:
+            raise ValueError(
+                f"password must be at most {BCRYPT_MAX_PASSWORD_BYTES} bytes"
+            )
+        salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+        return bcrypt.hashpw(encoded, salt).decode()
 
 
 class Prompt(Base):
@@ -202,6 +273,8 @@ class DocumentChunk(Base):
         "ParsedDocument", back_populates="chunks"
     )
 
+    __table_args__ = (Index("ix_docchunk_doc_serial", "document_id", "chunk_serial"),)
+
     @hybrid_property
     def chunk_length(self) -> int:
         return len(self.chunk_content) if self.chunk_content else 0
@@ -33,6 +33,13 @@ class BaseRepository(Generic[M]):
         await self._db.flush()
         return obj
 
+    async def bulk_create(self, objs: Sequence[M]) -> Sequence[M]:
+        # A single flush lets SQLAlchemy batch the rows into multi-row
+        # INSERT ... RETURNING statements instead of one round-trip per row.
+        self._db.add_all(objs)
+        await self._db.flush()
+        return objs
+
     async def delete(self, *args: Any, **kwargs: Any) -> None:
         stmt = delete(self.__model__).where(*args).filter_by(**kwargs)
         await self._db.execute(stmt)
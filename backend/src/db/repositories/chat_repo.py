@@ -1,7 +1,7 @@
 from typing import Sequence
 
-from sqlalchemy import update, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import exists, update, select
+from sqlalchemy.orm import aliased, selectinload
 
 from db.models import Chat, Prompt, User, Message
 from db.repositories.base_repo import BaseRepository
@@ -18,6 +18,36 @@ class ChatRepository(BaseRepository[Chat]):
             update(Chat).where(Chat.chat_id == chat_id).values(is_active=True)
         )
 
+    async def authorize_and_activate(self, chat_id: int, user: User) -> Chat | None:
+        # uq_one_active_chat_per_user is checked row by row, so the previously
+        # active chat has to be cleared by its own statement before the target
+        # is set. Both statements are guarded by ownership of the target; the
+        # second one returns None ("not found") for a foreign chat.
+        owned = aliased(Chat)
+        await self._db.execute(
+            update(Chat)
+            .where(
+                Chat.user_id == user.user_id,
+                Chat.is_active,
+                Chat.chat_id != chat_id,
+                exists().where(owned.chat_id == chat_id, owned.user_id == user.user_id),
+            )
+            .values(is_active=False)
+        )
+        stmt = (
+            update(Chat)
+            .where(Chat.chat_id == chat_id, Chat.user_id == user.user_id)
+            .values(is_active=True)
+            .returning(Chat)
+        )
+        result = await self._db.execute(
+            stmt, execution_options={"populate_existing": True}
+        )
+        chat = result.scalar_one_or_none()
+        if chat is not None:
+            await self._db.refresh(chat, attribute_names=["prompt"])
+        return chat
+
     async def create_new_chat(self, prompt: Prompt, user: User) -> Chat:
         chat = Chat(prompt_id=prompt.prompt_id, user=user)
         await self.set_active(chat_id=chat.id, user=user)
@@ -42,8 +72,6 @@ class ChatRepository(BaseRepository[Chat]):
         return result.scalars().all()
 
     async def get_one_by_id(self, pk: int) -> Chat | None:
-        from sqlalchemy.orm import selectinload
-
         stmt = (
             select(Chat)
             .where(Chat.id == pk)
@@ -1,4 +1,4 @@
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 
 from sqlalchemy import select
 
@@ -18,6 +18,37 @@ class DocumentChunkRepository(BaseRepository[DocumentChunk]):
         result = await self._db.execute(stmt)
         return result.scalars().all()
 
+    async def iter_by_document_id(
+        self, document_id: int, batch: int = 64
+    ) -> AsyncIterator[Sequence[DocumentChunk]]:
+        # Server-side cursor: only `batch` rows are held in memory at a time.
+        stmt = (
+            select(DocumentChunk)
+            .where(DocumentChunk.document_id == document_id)
+            .order_by(DocumentChunk.chunk_serial)
+            .execution_options(yield_per=batch)
+        )
+        result = await self._db.stream_scalars(stmt)
+        async for partition in result.partitions(batch):
+            yield partition
+
+    async def get_chunks_page(
+        self, document_id: int, after_serial: int = -1, limit: int = 100
+    ) -> Sequence[DocumentChunk]:
+        # Keyset pagination over ix_docchunk_doc_serial: pass the last
+        # chunk_serial of the previous page as after_serial.
+        stmt = (
+            select(DocumentChunk)
+            .where(
+                DocumentChunk.document_id == document_id,
+                DocumentChunk.chunk_serial > after_serial,
+            )
+            .order_by(DocumentChunk.chunk_serial)
+            .limit(limit)
+        )
+        result = await self._db.execute(stmt)
+        return result.scalars().all()
+
     async def get_many_by_ids(
         self, chunk_ids: Sequence[int]
     ) -> Sequence[DocumentChunk]:
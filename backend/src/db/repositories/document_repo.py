@@ -1,9 +1,9 @@
 from typing import Sequence
 
-from sqlalchemy import select, or_, exists
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, or_, exists, func
+from sqlalchemy.orm import raiseload, selectinload
 
-from db.models import ParsedDocument, User
+from db.models import DocumentChunk, ParsedDocument, User
 from db.repositories.base_repo import BaseRepository
 
 
@@ -11,17 +11,34 @@ class ParsedDocumentRepository(BaseRepository[ParsedDocument]):
     __model__ = ParsedDocument
 
     async def get_all_for_user(self, user: User) -> Sequence[ParsedDocument]:
-        stmt = select(ParsedDocument).where(
-            or_(ParsedDocument.user_id == user.id, ParsedDocument.is_general)
+        # DocumentResponse reads only column attributes, so no relationship is
+        # loaded here and any accidental lazy load fails loudly instead of N+1.
+        stmt = (
+            select(ParsedDocument)
+            .where(or_(ParsedDocument.user_id == user.id, ParsedDocument.is_general))
+            .options(raiseload("*"))
         )
         result = await self._db.execute(stmt)
         return result.scalars().all()
 
     async def get_one_with_chunks_by_id(self, document_id: int) -> ParsedDocument:
+        # Chunks come back as id/serial stubs only; chunk_content is deferred
+        # with raiseload so it has to be fetched through
+        # DocumentChunkRepository.get_chunks_page. populate_existing refreshes
+        # a document already in the identity map (e.g. during reprocessing)
+        # instead of returning its stale chunk list.
         stmt = (
             select(ParsedDocument)
             .where(ParsedDocument.document_id == document_id)
-            .options(selectinload(ParsedDocument.chunks))
+            .options(
+                selectinload(ParsedDocument.chunks)
+                .load_only(
+                    DocumentChunk.chunk_id, DocumentChunk.chunk_serial, raiseload=True
+                )
+                .raiseload("*"),
+                raiseload("*"),
+            )
+            .execution_options(populate_existing=True)
         )
         result = await self._db.execute(stmt)
         return result.scalars().one_or_none()
@@ -37,6 +54,17 @@ class ParsedDocumentRepository(BaseRepository[ParsedDocument]):
         result = await self._db.execute(stmt)
         return result.scalars().all()
 
+    async def get_total_content_length(self, document_ids: Sequence[int]) -> int:
+        # Summed by the database so callers that only size the documents do
+        # not pull their content over the wire.
+        if not document_ids:
+            return 0
+        stmt = select(
+            func.coalesce(func.sum(func.char_length(ParsedDocument.content)), 0)
+        ).where(ParsedDocument.document_id.in_(document_ids))
+        result = await self._db.execute(stmt)
+        return int(result.scalar_one())
+
     async def check_document_exists(self, document_name: str, user: User) -> bool:
         stmt = select(
             exists().where(
@@ -24,23 +24,23 @@ class UserRepository(BaseRepository[User]):
         return await self._db.scalar(select(User).filter(User.username == username))
 
     async def create_base_admin(
-        self, username: str, email: str, password: str
+        self, username: str, email: str, hashed_password: str
     ) -> User | None:
         user = User(
             username=username,
             email=email,
-            hashed_password=User.get_password_hash(password),
+            hashed_password=hashed_password,
             role=Role.ADMIN,
         )
         return await self.create(user)
 
 
-async def create_default_admin():
+async def create_default_admin(hashed_password: str):
     db = session_factory()
     try:
         repo = UserRepository(db)
         if await repo.create_base_admin(
-            BASE_ADMIN_USERNAME, BASE_ADMIN_EMAIL, BASE_ADMIN_PASSWORD
+            BASE_ADMIN_USERNAME, BASE_ADMIN_EMAIL, hashed_password
         ):
             logger.info(
                 "Created base admin",
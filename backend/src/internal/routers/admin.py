@@ -1,3 +1,5 @@
+import asyncio
+
 import structlog
 from sqladmin import ModelView, Admin
 from sqladmin.authentication import AuthenticationBackend
@@ -7,7 +9,7 @@ from starlette.requests import Request
 from wtforms import TextAreaField
 from wtforms.validators import DataRequired
 
-from config import settings
+from config import get_settings
 from db.base import session_factory
 from db.models import (
     User,
@@ -45,7 +47,11 @@ class AdminAuth(AuthenticationBackend):
                 user_repo = UserRepository(db)
                 user = await user_repo.get_by_username(username)
 
-                if user and user.verify_password(password) and user.role == Role.ADMIN:
+                if (
+                    user
+                    and user.role == Role.ADMIN
+                    and await asyncio.to_thread(user.verify_password, password)
+                ):
                     request.session.update(
                         {
                             "user_id": str(user.user_id),
@@ -209,7 +215,7 @@ class MessageAdmin(ModelView, model=Message):
 
 
 def setup_admin(app, engine: AsyncEngine):
-    authentication_backend = AdminAuth(secret_key=settings.ADMIN_SECRET_KEY)
+    authentication_backend = AdminAuth(secret_key=get_settings().ADMIN_SECRET_KEY)
 
     admin = Admin(
         app=app,
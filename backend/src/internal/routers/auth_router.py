@@ -1,3 +1,4 @@
+import asyncio
 from datetime import timedelta
 
 from fastapi import APIRouter, HTTPException, status
@@ -39,7 +40,9 @@ async def login_user(user_data: UserLogin, db: Db) -> Token:
     user_repo = UserRepository(db)
     user = await user_repo.get_by_email(user_data.email)
 
-    if not user or not user.verify_password(user_data.password):
+    if not user or not await asyncio.to_thread(
+        user.verify_password, user_data.password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -1,4 +1,11 @@
+import asyncio
+from typing import Any, AsyncIterator
+
+import orjson
+import structlog
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from starlette import status
 
 from db.models import Message, MessageType
@@ -15,14 +22,21 @@ from internal.schemas.chat import (
 )
 from services.rag import RagAgent
 
+logger = structlog.get_logger(__name__)
+
 router = APIRouter(prefix="/chat", tags=["chat"])
 agent = RagAgent()
 
+CHAT_LIST_ADAPTER = TypeAdapter(list[ChatResponse])
+
+# Upper bound on the text merged into one streamed delta frame.
+DELTA_FRAME_CHARS = 4096
+
 
 @router.get("", response_model=list[ChatResponse])
 async def get_all_chats(db: Db, user: CtxUser) -> list[ChatResponse]:
     chats = await ChatRepository(db).get_all_for_user(user)
-    return [ChatResponse.model_validate(chat) for chat in chats]
+    return CHAT_LIST_ADAPTER.validate_python(chats, from_attributes=True)
 
 
 @router.get("/{chat_id}", response_model=ExpandedChatResponse)
@@ -67,29 +81,42 @@ async def delete_chat(db: Db, user: CtxUser, chat_id: int) -> None:
     await chat_repo.save(chat)
 
 
-@router.post("/{chat_id}/message", response_model=MessageResponse)
-async def create_message(
+async def _start_turn(
     db: Db, user: CtxUser, chat_id: int, message_data: BaseMessage
-) -> MessageResponse:
+) -> tuple[str | None, Message]:
     chat_repo = ChatRepository(db)
 
-    if (
-        not (chat := await chat_repo.get_one_by_id(chat_id))
-        or chat.user_id != user.user_id
-    ):
+    if not (chat := await chat_repo.authorize_and_activate(chat_id, user)):
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    await chat_repo.set_active(chat_id=chat_id, user=user)
     prompt_text = chat.prompt.text if getattr(chat, "prompt", None) else None
 
-    message_repo = MessageRepository(db)
     user_message = Message(
         content=message_data.content,
         message_type=MessageType.USER,
         chat_id=chat_id,
         documents_ids=message_data.documents_ids,
     )
-    await message_repo.create(user_message)
+    await MessageRepository(db).create(user_message)
+    return prompt_text, user_message
+
+
+async def _store_answer(db: Db, user_message: Message, answer: str) -> Message:
+    ai_message = Message(
+        content=answer,
+        message_type=MessageType.MODEL,
+        chat_id=user_message.chat_id,
+        documents_ids=user_message.documents_ids,
+    )
+    await MessageRepository(db).create(ai_message)
+    return ai_message
+
+
+@router.post("/{chat_id}/message", response_model=MessageResponse)
+async def create_message(
+    db: Db, user: CtxUser, chat_id: int, message_data: BaseMessage
+) -> MessageResponse:
+    prompt_text, user_message = await _start_turn(db, user, chat_id, message_data)
 
     result = await agent.run(
         db=db,
@@ -100,12 +127,74 @@ async def create_message(
         answer_instructions=prompt_text,
     )
 
-    ai_message = Message(
-        content=result.answer,
-        message_type=MessageType.MODEL,
-        chat_id=chat_id,
-        documents_ids=user_message.documents_ids,
-    )
-    await message_repo.create(ai_message)
-
+    ai_message = await _store_answer(db, user_message, result.answer)
     return MessageResponse.model_validate(ai_message)
+
+
+def _sse(event: dict[str, Any]) -> str:
+    return f"data: {orjson.dumps(event).decode()}\n\n"
+
+
+async def _coalesced(deltas: asyncio.Queue[str | None]) -> AsyncIterator[str]:
+    """Yield the deltas from ``deltas`` until ``None``, several per item.
+
+    Only deltas already queued are merged, so a frame is never held back
+    waiting for more tokens.
+    """
+    while (delta := await deltas.get()) is not None:
+        parts = [delta]
+        size = len(delta)
+        while size < DELTA_FRAME_CHARS and not deltas.empty():
+            if (delta := deltas.get_nowait()) is None:
+                yield "".join(parts)
+                return
+            parts.append(delta)
+            size += len(delta)
+        yield "".join(parts)
+
+
+@router.post("/{chat_id}/message/stream")
+async def stream_message(
+    db: Db, user: CtxUser, chat_id: int, message_data: BaseMessage
+) -> StreamingResponse:
+    """Like ``create_message``, but streams the answer as server-sent events.
+
+    Emits ``{"type": "delta", "content": ...}`` frames while the answer is
+    generated, then a final ``{"type": "message", "message": ...}`` with the
+    stored MessageResponse (whose content supersedes the deltas) or
+    ``{"type": "error", "detail": ...}``.
+    """
+    prompt_text, user_message = await _start_turn(db, user, chat_id, message_data)
+    deltas: asyncio.Queue[str | None] = asyncio.Queue()
+
+    async def events() -> AsyncIterator[str]:
+        task = asyncio.create_task(
+            agent.run(
+                db=db,
+                user=user,
+                query=user_message.content,
+                chat_id=chat_id,
+                selected_document_ids=user_message.documents_ids or [],
+                answer_instructions=prompt_text,
+                on_token=deltas.put,
+            )
+        )
+        task.add_done_callback(lambda _: deltas.put_nowait(None))
+        try:
+            async for delta in _coalesced(deltas):
+                yield _sse({"type": "delta", "content": delta})
+            result = task.result()
+            ai_message = await _store_answer(db, user_message, result.answer)
+            response = MessageResponse.model_validate(ai_message)
+            # The body outlives the request handler, so the turn is
+            # committed here rather than left to the get_db dependency.
+            await db.commit()
+            yield _sse({"type": "message", "message": response.model_dump(mode="json")})
+        except Exception:
+            logger.exception("chat-stream-failed", chat_id=chat_id)
+            await db.rollback()
+            yield _sse({"type": "error", "detail": "Failed to generate an answer"})
+        finally:
+            task.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
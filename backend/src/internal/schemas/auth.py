@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
-from db.models import Role
+from db.models import BCRYPT_MAX_PASSWORD_BYTES, Role
 
 
 class UserBase(BaseModel):
@@ -12,6 +12,15 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+    @field_validator("password")
+    @classmethod
+    def _fits_bcrypt(cls, value: str) -> str:
+        if len(value.encode()) > BCRYPT_MAX_PASSWORD_BYTES:
+            raise ValueError(
+                f"password must be at most {BCRYPT_MAX_PASSWORD_BYTES} bytes"
+            )
+        return value
+
 
 class UserLogin(BaseModel):
     email: str
@@ -1,3 +1,5 @@
+import asyncio
+import time
 from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator
 
@@ -8,33 +10,51 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from config import settings
-from db.base import init_db, engine, session_factory
-from db.repositories.user_repo import create_default_admin
-from internal.dependencies import Db
+from config import get_settings
+from db.base import count_queries, init_db, engine, session_factory
+from db.models import User
+from db.repositories.user_repo import BASE_ADMIN_PASSWORD, create_default_admin
 from internal.routers import auth_router, chat_router, document_router
 from internal.routers.admin import setup_admin
 from setup_logger import setup_logging
+from services.document_processing.parser import shutdown_parser_pools
 from services.rag.prompt_registry import seed_prompts
 
-setup_logging(log_level=settings.LOG_LEVEL)
+setup_logging(log_level=get_settings().LOG_LEVEL)
 logger = structlog.get_logger(__name__)
 
 
+async def _seed_prompts() -> None:
+    async with session_factory() as session:
+        await seed_prompts(session)
+        await session.commit()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, Any]:
     logger.info("Application starting up")
 
     try:
+        # Hash the admin password off the event loop while the schema is
+        # being created; admin creation and prompt seeding then run together
+        # on separate sessions, which also warms the connection pool.
+        admin_hash = (
+            asyncio.create_task(
+                asyncio.to_thread(User.get_password_hash, BASE_ADMIN_PASSWORD)
+            )
+            if get_settings().ADD_BASE_ADMIN
+            else None
+        )
+
         logger.info("Initializing database connection")
         await init_db()
         logger.info("Database initialized successfully")
-        if settings.ADD_BASE_ADMIN:
-            await create_default_admin()
 
-        async with session_factory() as session:
-            await seed_prompts(session)
-            await session.commit()
+        startup = [_seed_prompts()]
+        if admin_hash is not None:
+            startup.append(create_default_admin(await admin_hash))
+        await asyncio.gather(*startup)
+        chat_router.agent.start_background_tasks()
 
         yield
 
@@ -44,6 +64,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, Any]:
 
     finally:
         logger.info("Application shutting down")
+        await chat_router.agent.aclose()
+        shutdown_parser_pools()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -58,6 +80,21 @@ app.add_middleware(
 )
 
 
+if get_settings().DB_LOG_QUERY_COUNTS:
+    # Per-request SQL statement counts, to catch N+1 regressions in dev/staging.
+    @app.middleware("http")
+    async def log_query_count(request: Request, call_next):
+        with count_queries() as queries:
+            response = await call_next(request)
+        logger.info(
+            "request-queries",
+            method=request.method,
+            path=request.url.path,
+            count=len(queries),
+        )
+        return response
+
+
 api_router = APIRouter(prefix="/api/v1")
 api_router.include_router(auth_router.router)
 api_router.include_router(chat_router.router)
@@ -68,14 +105,38 @@ app.include_router(api_router)
 admin = setup_admin(app, engine)
 
 
+# Probes within READINESS_TTL of the last check reuse its result, and
+# concurrent probes wait on one SELECT 1 instead of each taking a connection.
+READINESS_TTL = 2.0
+_readiness: dict[str, Any] = {"ts": float("-inf"), "error": None}
+_readiness_lock = asyncio.Lock()
+
+
+async def _check_db() -> str | None:
+    async with _readiness_lock:
+        if time.monotonic() - _readiness["ts"] < READINESS_TTL:
+            return _readiness["error"]
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            error = None
+        except Exception as e:
+            error = str(e)
+        _readiness.update(ts=time.monotonic(), error=error)
+        return error
+
+
+@app.get("/livez", include_in_schema=False)
+async def liveness_check() -> JSONResponse:
+    return JSONResponse({"status": "ok"}, status_code=200)
+
+
+@app.get("/readyz", include_in_schema=False)
 @app.get("/health", include_in_schema=False)
-async def health_check(db: Db) -> JSONResponse:
-    try:
-        logger.info("health-check", endpoint="/health")
-        await db.execute(text("SELECT 1"))
-        return JSONResponse({"status": "healthy"}, status_code=200)
-    except Exception as e:
-        return JSONResponse({"status": "unhealthy", "error": str(e)}, 503)
+async def health_check() -> JSONResponse:
+    if error := await _check_db():
+        return JSONResponse({"status": "unhealthy", "error": error}, 503)
+    return JSONResponse({"status": "healthy"}, status_code=200)
 
 
 @app.exception_handler(Exception)
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from typing import Iterable
 
-from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from .models import DocumentChunkPayload, MarkdownDocument
@@ -43,14 +42,13 @@ class ChunkSplitter:
         )
 
     def split(self, document: MarkdownDocument) -> list[DocumentChunkPayload]:
-        base_document = Document(
-            page_content=document.content,
-            metadata=document.metadata or {},
-        )
-        chunk_documents = self._char_splitter.split_documents([base_document])
+        # split_documents() deep-copies the document metadata (including the
+        # whole sections list) into every chunk; chunks only read it, so one
+        # dict is shared instead.
+        metadata = document.metadata or {}
         payloads: list[DocumentChunkPayload] = []
-        for index, doc in enumerate(chunk_documents):
-            text = doc.page_content.strip()
+        for index, chunk in enumerate(self._char_splitter.split_text(document.content)):
+            text = chunk.strip()
             if not text:
                 continue
 
@@ -58,7 +56,7 @@ class ChunkSplitter:
                 DocumentChunkPayload(
                     content=text,
                     serial=index,
-                    metadata=doc.metadata,
+                    metadata=metadata,
                 )
             )
 
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
 import asyncio
+import codecs
+import functools
+import hashlib
 import io
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Any, Callable
 
 import structlog
-from docx import Document as DocxDocument
-from pdfminer.high_level import extract_text as pdf_extract_text
-from pptx import Presentation
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional speedup
+    xxhash = None
+
+from config import settings
 
 from .models import MarkdownDocument
 
@@ -16,16 +28,97 @@ from .models import MarkdownDocument
 logger = structlog.get_logger(__name__)
 
 
+def _extract_pdf_text(content: bytes) -> str:
+    # Format libraries are imported on first use; together they add
+    # hundreds of ms to app startup otherwise.
+    from pdfminer.high_level import extract_text as pdf_extract_text
+
+    return pdf_extract_text(io.BytesIO(content)) or ""
+
+
+def _content_digest(data: bytes) -> bytes:
+    # Cache key only, not a security boundary: xxh3 is ~20x faster than
+    # blake2b on multi-MB uploads and 128 bits keeps collisions negligible.
+    if xxhash is not None:
+        return xxhash.xxh3_128_digest(data)
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+@functools.cache
+def _pdf_process_pool() -> ProcessPoolExecutor | None:
+    # pdfminer is pure Python and holds the GIL for the whole parse, so in a
+    # thread it stalls the event loop; worker processes parse in parallel.
+    # "spawn" avoids forking a process that already runs threads.
+    if settings.PARSER_PROCESS_WORKERS <= 0:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=settings.PARSER_PROCESS_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+_pdf_process_pool_lock = threading.Lock()
+
+
+def _replace_pdf_process_pool(broken: ProcessPoolExecutor) -> None:
+    # A dead worker (OOM, crash inside pdfminer) leaves the executor raising
+    # BrokenProcessPool on every submit, so the next call builds a new one.
+    with _pdf_process_pool_lock:
+        if _pdf_process_pool() is broken:
+            _pdf_process_pool.cache_clear()
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+@functools.cache
+def _parse_thread_pool() -> ThreadPoolExecutor:
+    # Parses can run for seconds; on the default to_thread executor they
+    # would queue short calls (password checks, S3 requests) behind them.
+    return ThreadPoolExecutor(
+        max_workers=max(settings.PARSER_THREAD_WORKERS, 1),
+        thread_name_prefix="doc-parse",
+    )
+
+
+def shutdown_parser_pools() -> None:
+    """Stop the parse worker pools started so far; later parses start new ones."""
+    pools: list[Executor | None] = []
+    for factory in (_pdf_process_pool, _parse_thread_pool):
+        if factory.cache_info().currsize:
+            pools.append(factory())
+            factory.cache_clear()
+    for pool in pools:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
 class DocumentParser:
     """Lightweight parser that converts common office formats into Markdown."""
 
+    def __init__(self, *, cache_size: int = 32) -> None:
+        # Extension -> bound parser, resolved once instead of per upload.
+        self._parsers: dict[str, Callable[[bytes, str], tuple[str, dict[str, Any]]]] = {
+            ".pdf": self._parse_pdf,
+            ".docx": self._parse_docx,
+            ".dotx": self._parse_docx,
+            ".pptx": self._parse_pptx,
+            ".ppsx": self._parse_pptx,
+        }
+        # (digest(content), extension) -> (markdown, metadata) for recently
+        # parsed byte payloads, so re-uploads of the same file skip parsing.
+        self._cache_size = cache_size
+        self._cache: OrderedDict[tuple[bytes, str], tuple[str, dict[str, Any]]] = (
+            OrderedDict()
+        )
+        self._cache_lock = threading.Lock()
+
     async def parse(
         self, *, content_bytes: bytes, filename: str | None = None
     ) -> MarkdownDocument:
-        return await asyncio.to_thread(
-            self.parse_sync,
-            content_bytes=content_bytes,
-            filename=filename,
+        return await asyncio.get_running_loop().run_in_executor(
+            _parse_thread_pool(),
+            functools.partial(
+                self.parse_sync, content_bytes=content_bytes, filename=filename
+            ),
         )
 
     def parse_sync(
@@ -42,41 +135,83 @@ class DocumentParser:
                 "parse_sync cannot be used inside an active event loop; call `await parse(...)` instead."
             )
 
-        markdown, metadata = self._parse_bytes(
-            content_bytes=content_bytes, filename=filename
+        # The extension (and so the format handler) is resolved once per call
+        # and shared by the cache key and the dispatch.
+        extension = (Path(filename).suffix.lower() if filename else "") or ""
+        markdown, metadata = self._parse_bytes_cached(
+            content_bytes=content_bytes, filename=filename, extension=extension
         )
         if not markdown.strip():
             raise RuntimeError("Parsed document is empty")
 
         return MarkdownDocument(content=markdown, metadata=metadata)
 
+    def _parse_bytes_cached(
+        self, *, content_bytes: bytes, filename: str | None, extension: str
+    ) -> tuple[str, dict[str, Any]]:
+        # Plain text is just a decode: hashing it and keeping a decoded copy
+        # in the cache costs more than parsing it again.
+        if self._cache_size <= 0 or extension not in self._parsers:
+            return self._parse_bytes(
+                content_bytes=content_bytes, filename=filename, extension=extension
+            )
+
+        key = (_content_digest(content_bytes), extension)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+
+        if cached is None:
+            cached = self._parse_bytes(
+                content_bytes=content_bytes, filename=filename, extension=extension
+            )
+            with self._cache_lock:
+                self._cache[key] = cached
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        markdown, metadata = cached
+        # Metadata carries the upload's filename; hand out a fresh dict.
+        metadata = {**metadata, "source_filename": filename or "document"}
+        return markdown, metadata
+
     # ------------------------------------------------------------------ #
     # Internal helpers
     # ------------------------------------------------------------------ #
 
     def _parse_bytes(
-        self, *, content_bytes: bytes, filename: str | None
+        self, *, content_bytes: bytes, filename: str | None, extension: str
     ) -> tuple[str, dict[str, Any]]:
-        extension = (Path(filename).suffix.lower() if filename else "") or ""
         parser = self._resolve_parser(extension)
         return parser(content_bytes, filename or "document")
 
     def _resolve_parser(
         self, extension: str
     ) -> Callable[[bytes, str], tuple[str, dict[str, Any]]]:
-        if extension == ".pdf":
-            return self._parse_pdf
-        if extension in {".docx", ".dotx"}:
-            return self._parse_docx
-        if extension in {".pptx", ".ppsx"}:
-            return self._parse_pptx
-        return self._parse_plain_text
+        return self._parsers.get(extension, self._parse_plain_text)
 
     def _parse_pdf(
         self, content_bytes: bytes, filename: str
     ) -> tuple[str, dict[str, Any]]:
         try:
-            text = pdf_extract_text(io.BytesIO(content_bytes)) or ""
+            if (pool := _pdf_process_pool()) is not None:
+                try:
+                    text = pool.submit(_extract_pdf_text, content_bytes).result()
+                except BrokenProcessPool:
+                    # Possibly another upload's worker died; retry once on a
+                    # fresh pool rather than in-process, where a crash in
+                    # pdfminer would take the app down.
+                    logger.warning("pdf-process-pool-broken", filename=filename)
+                    _replace_pdf_process_pool(pool)
+                    pool = _pdf_process_pool()
+                    try:
+                        text = pool.submit(_extract_pdf_text, content_bytes).result()
+                    except BrokenProcessPool:
+                        _replace_pdf_process_pool(pool)
+                        raise
+            else:
+                text = _extract_pdf_text(content_bytes)
         except Exception as exc:
             raise RuntimeError("Failed to parse PDF document") from exc
 
@@ -86,22 +221,33 @@ class DocumentParser:
     def _parse_docx(
         self, content_bytes: bytes, filename: str
     ) -> tuple[str, dict[str, Any]]:
+        from docx import Document as DocxDocument
+
         try:
-            document = DocxDocument(io.BytesIO(content_bytes))
+            document = DocxDocument(self._as_stream(content_bytes))
         except Exception as exc:
             raise RuntimeError("Failed to parse DOCX document") from exc
 
         lines: list[str] = []
         sections: list[dict[str, Any]] = []
         order = 0
+        # paragraph.style resolves the style through the styles part on every
+        # access (twice in the old conditional), so the heading level is
+        # looked up once per distinct style id and reused.
+        heading_levels: dict[str | None, int | None] = {}
 
         for paragraph in document.paragraphs:
             text = paragraph.text.strip()
             if not text:
                 continue
 
-            style_name = paragraph.style.name if paragraph.style else ""
-            heading_level = self._heading_level_from_style(style_name)
+            style_id = paragraph._p.style
+            if style_id not in heading_levels:
+                style = paragraph.style
+                heading_levels[style_id] = self._heading_level_from_style(
+                    style.name if style is not None else ""
+                )
+            heading_level = heading_levels[style_id]
 
             if heading_level:
                 level = min(heading_level, 6)
@@ -119,8 +265,10 @@ class DocumentParser:
     def _parse_pptx(
         self, content_bytes: bytes, filename: str
     ) -> tuple[str, dict[str, Any]]:
+        from pptx import Presentation
+
         try:
-            presentation = Presentation(io.BytesIO(content_bytes))
+            presentation = Presentation(self._as_stream(content_bytes))
         except Exception as exc:
             raise RuntimeError("Failed to parse PPTX document") from exc
 
@@ -169,6 +317,12 @@ class DocumentParser:
     # Utility helpers
     # ------------------------------------------------------------------ #
 
+    def _as_stream(self, content: bytes) -> io.BytesIO:
+        # BytesIO(bytes) shares the bytes buffer until written to, so a fresh
+        # wrapper per call is free; a pooled, reused BytesIO would have to
+        # copy the payload in with write() instead.
+        return io.BytesIO(content)
+
     def _base_metadata(self, filename: str) -> dict[str, Any]:
         return {"source_filename": filename, "sections": []}
 
@@ -186,28 +340,38 @@ class DocumentParser:
         return None
 
     def _decode_bytes(self, content_bytes: bytes) -> str:
-        for encoding in ("utf-8", "utf-16", "cp1251", "latin-1"):
+        # ASCII is the common case and needs no trial decoding. UTF-16 is only
+        # tried with a BOM: without one, any even-length cp1251 text "decodes"
+        # as UTF-16 garbage instead of falling through to cp1251.
+        if content_bytes.isascii():
+            return content_bytes.decode("ascii")
+        if content_bytes.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return content_bytes.decode("utf-16", errors="replace")
+
+        for encoding in ("utf-8-sig", "cp1251"):
             try:
                 return content_bytes.decode(encoding)
             except UnicodeDecodeError:
                 continue
 
-        return content_bytes.decode("utf-8", errors="ignore")
+        return content_bytes.decode("latin-1")
 
     def _normalize_text(self, text: str) -> str:
-        lines = [line.rstrip() for line in text.splitlines()]
+        # One pass over the lines with a local append; the old intermediate
+        # rstripped copy was redundant with the strip() below.
         normalized: list[str] = []
+        append = normalized.append
         blank = False
 
-        for line in lines:
+        for line in text.splitlines():
             stripped = line.strip()
             if not stripped:
                 if not blank and normalized:
-                    normalized.append("")
+                    append("")
                     blank = True
                 continue
 
-            normalized.append(stripped)
+            append(stripped)
             blank = False
 
         return "\n".join(normalized).strip()
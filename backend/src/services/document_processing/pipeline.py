@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any
 
 import structlog
@@ -20,6 +21,8 @@ from .vector_manager import ChunkRecord, DocumentVectorManager
 
 logger = structlog.get_logger(__name__)
 
+UPLOAD_READ_CHUNK_BYTES = 64 * 1024
+
 
 class DocumentExistsError(Exception): ...
 
@@ -54,15 +57,25 @@ class DocumentUploadPipeline:
         if await doc_repo.check_document_exists(filename, user):
             raise DocumentExistsError
 
+        # Size is checked before anything is buffered. The accepted payload is
+        # then read once and shared by the S3 upload and the parser (both wrap
+        # it in BytesIO without copying), so the two can run concurrently.
+        await self._measure_upload(file)
         content_bytes = await file.read()
-        self._ensure_file_size(content_bytes)
-        minio_url = await upload_to_s3(content_bytes, filename, user)
 
-        markdown_doc = await self._parse_document(
-            content_bytes=content_bytes,
-            filename=filename,
+        minio_url, markdown_doc = await asyncio.gather(
+            upload_to_s3(content_bytes, filename, user),
+            self._parse_document(content_bytes=content_bytes, filename=filename),
+            return_exceptions=True,
+        )
+        for result in (markdown_doc, minio_url):
+            if isinstance(result, BaseException):
+                raise result
+        # Splitting a large document is CPU-bound; keep it off the event loop
+        # like parsing.
+        chunk_payloads = await asyncio.to_thread(
+            self._chunk_splitter.split, markdown_doc
         )
-        chunk_payloads = self._chunk_splitter.split(markdown_doc)
 
         chunk_repo = DocumentChunkRepository(db)
 
@@ -74,9 +87,9 @@ class DocumentUploadPipeline:
         )
 
         try:
+            # create() flushes, which is all that is needed for the PK; every
+            # other column is set client-side, so no refresh SELECT.
             await doc_repo.create(document)
-            await db.flush()
-            await db.refresh(document)
 
             stored_chunks = await self._store_chunks(
                 chunk_repo=chunk_repo,
@@ -94,7 +107,7 @@ class DocumentUploadPipeline:
             logger.error(
                 "document-processing-failed",
                 filename=filename,
-                reason=str(exc),
+                exc_info=True,
             )
             raise HTTPException(
                 status_code=HTTP_400_BAD_REQUEST,
@@ -103,8 +116,22 @@ class DocumentUploadPipeline:
 
         return document
 
-    def _ensure_file_size(self, content_bytes: bytes) -> None:
-        if len(content_bytes) > self._max_file_size_bytes:
+    async def _measure_upload(self, file: UploadFile) -> None:
+        """Reject oversize uploads as early as possible."""
+        if file.size is not None:
+            size = file.size
+        else:
+            size = 0
+            while chunk := await file.read(UPLOAD_READ_CHUNK_BYTES):
+                size += len(chunk)
+                if size > self._max_file_size_bytes:
+                    break
+
+        self._ensure_file_size(size)
+        await file.seek(0)
+
+    def _ensure_file_size(self, size: int) -> None:
+        if size > self._max_file_size_bytes:
             raise HTTPException(
                 status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 detail="File is too large",
@@ -125,7 +152,7 @@ class DocumentUploadPipeline:
             logger.error(
                 "document-parse-failed",
                 filename=filename,
-                reason=str(exc),
+                exc_info=True,
             )
             raise HTTPException(
                 status_code=HTTP_400_BAD_REQUEST,
@@ -151,23 +178,20 @@ class DocumentUploadPipeline:
         document: ParsedDocument,
         chunk_payloads: list[DocumentChunkPayload],
     ) -> list[ChunkRecord]:
-        stored_chunks: list[ChunkRecord] = []
-
-        for payload in chunk_payloads:
-            chunk_content = payload.content
-            serial = payload.serial
-
-            doc_chunk = DocumentChunk(
-                chunk_content=chunk_content,
-                chunk_serial=serial,
-                document=document,
-            )
-            await chunk_repo.create(doc_chunk)
-            stored_chunks.append(
-                ChunkRecord(chunk=doc_chunk, metadata=payload.metadata)
+        doc_chunks = [
+            DocumentChunk(
+                chunk_content=payload.content,
+                chunk_serial=payload.serial,
+                document_id=document.document_id,
             )
+            for payload in chunk_payloads
+        ]
+        await chunk_repo.bulk_create(doc_chunks)
 
-        return stored_chunks
+        return [
+            ChunkRecord(chunk=doc_chunk, metadata=payload.metadata)
+            for doc_chunk, payload in zip(doc_chunks, chunk_payloads)
+        ]
 
     async def _index_chunks(
         self,
@@ -185,9 +209,9 @@ class DocumentUploadPipeline:
                 chunk_records=chunk_records,
                 document_metadata=document_metadata,
             )
-        except Exception as exc:
+        except Exception:
             logger.error(
                 "document-vector-index-failed",
                 document_id=document.document_id,
-                reason=str(exc),
+                exc_info=True,
             )
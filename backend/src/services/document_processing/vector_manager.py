@@ -84,65 +84,93 @@ class DocumentVectorManager:
         score_threshold: float | None = None,
         document_ids: Sequence[int] | None = None,
     ) -> list[VectorSearchResult]:
-        if not query.strip():
-            return []
+        (results,) = await self.search_chunks_many(
+            chunk_repo=chunk_repo,
+            user_id=user_id,
+            queries=[query],
+            limit=limit,
+            score_threshold=score_threshold,
+            document_ids=document_ids,
+        )
+        return results
+
+    async def search_chunks_many(
+        self,
+        *,
+        chunk_repo: DocumentChunkRepository,
+        user_id: int,
+        queries: Sequence[str],
+        limit: int = 5,
+        score_threshold: float | None = None,
+        document_ids: Sequence[int] | None = None,
+    ) -> list[list[VectorSearchResult]]:
+        """Search several queries at once; results are returned per query.
+
+        The queries are embedded in one request and searched with one Qdrant
+        batch request; matched chunks are then loaded with a single query.
+        """
+        results_by_query: list[list[VectorSearchResult]] = [[] for _ in queries]
+        active = [index for index, query in enumerate(queries) if query.strip()]
+        if not active:
+            return results_by_query
 
         if not self._embedding_client.is_enabled:
             logger.info(
                 "embedding-disabled", reason="OpenRouter API key not configured"
             )
-            return []
+            return results_by_query
 
         if not self._vector_store.is_enabled:
             logger.info("qdrant-disabled", reason="Qdrant URL not configured")
-            return []
+            return results_by_query
 
-        embeddings = await self._embedding_client.embed_texts([query])
+        embeddings = await self._embedding_client.embed_queries(
+            [queries[index] for index in active]
+        )
         if not embeddings:
-            return []
+            return results_by_query
 
-        search_results = await self._vector_store.search_document_embeddings(
+        points_by_query = await self._vector_store.search_document_embeddings_batch(
             user_id=user_id,
-            query_embedding=embeddings[0],
+            query_embeddings=embeddings,
             limit=limit,
             score_threshold=score_threshold,
             document_ids=document_ids,
         )
 
-        if not search_results:
-            return []
-
-        chunk_ids: list[int] = []
-        for point in search_results:
-            payload = getattr(point, "payload", {}) or {}
-            chunk_id = payload.get("chunk_id") or getattr(point, "id", None)
-            if isinstance(chunk_id, str) and chunk_id.isdigit():
-                chunk_id = int(chunk_id)
-            if isinstance(chunk_id, int):
-                chunk_ids.append(chunk_id)
-
+        chunk_ids = {
+            chunk_id
+            for points in points_by_query
+            for point in points
+            if (chunk_id := self._point_chunk_id(point)) is not None
+        }
         if not chunk_ids:
-            return []
+            return results_by_query
 
-        chunks = await chunk_repo.get_many_by_ids(chunk_ids)
+        chunks = await chunk_repo.get_many_by_ids(list(chunk_ids))
         chunk_map = {chunk.chunk_id: chunk for chunk in chunks}
 
-        results: list[VectorSearchResult] = []
-        for point in search_results:
-            payload = getattr(point, "payload", {}) or {}
-            chunk_id = payload.get("chunk_id") or getattr(point, "id", None)
-            if isinstance(chunk_id, str) and chunk_id.isdigit():
-                chunk_id = int(chunk_id)
-            chunk = chunk_map.get(chunk_id)
-            if not chunk:
-                continue
-
-            results.append(
-                VectorSearchResult(
-                    chunk=chunk,
-                    score=getattr(point, "score", 0.0),
-                    payload=payload,
+        for index, points in zip(active, points_by_query):
+            results = results_by_query[index]
+            for point in points:
+                chunk = chunk_map.get(self._point_chunk_id(point))
+                if not chunk:
+                    continue
+
+                results.append(
+                    VectorSearchResult(
+                        chunk=chunk,
+                        score=getattr(point, "score", 0.0),
+                        payload=getattr(point, "payload", {}) or {},
+                    )
                 )
-            )
 
-        return results
+        return results_by_query
+
+    @staticmethod
+    def _point_chunk_id(point: Any) -> int | None:
+        payload = getattr(point, "payload", {}) or {}
+        chunk_id = payload.get("chunk_id") or getattr(point, "id", None)
+        if isinstance(chunk_id, str) and chunk_id.isdigit():
+            chunk_id = int(chunk_id)
+        return chunk_id if isinstance(chunk_id, int) else None
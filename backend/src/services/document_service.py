@@ -68,3 +68,23 @@ async def search_document_chunks(
         score_threshold=score_threshold,
         document_ids=document_ids,
     )
+
+
+async def search_document_chunks_many(
+    *,
+    db: AsyncSession,
+    user: User,
+    queries: Sequence[str],
+    limit: int = 5,
+    score_threshold: float | None = None,
+    document_ids: Sequence[int] | None = None,
+) -> list[list[VectorSearchResult]]:
+    chunk_repo = DocumentChunkRepository(db)
+    return await vector_manager.search_chunks_many(
+        chunk_repo=chunk_repo,
+        user_id=user.user_id,
+        queries=queries,
+        limit=limit,
+        score_threshold=score_threshold,
+        document_ids=document_ids,
+    )
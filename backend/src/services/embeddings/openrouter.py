@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from array import array
+from collections import OrderedDict
 from typing import Sequence
 
 import httpx
@@ -8,6 +11,12 @@ import httpx
 from config import settings
 
 
+# Query vectors shared by every client instance (the agent's and the vector
+# manager's), keyed by (model, whitespace-normalized text). float32 arrays are
+# ~8x smaller than lists of Python floats.
+_query_cache: OrderedDict[tuple[str, str], array] = OrderedDict()
+
+
 class OpenRouterEmbeddingClient:
     DEFAULT_BASE_URL = "https://openrouter.ai/api/v1/embeddings"
 
@@ -20,6 +29,9 @@ class OpenRouterEmbeddingClient:
         referer: str | None = None,
         title: str | None = None,
         timeout_seconds: float = 30.0,
+        batch_size: int = 64,
+        concurrency: int = 4,
+        query_cache_size: int = 1024,
     ) -> None:
         self._api_key = api_key
         self._model = model
@@ -27,26 +39,57 @@ class OpenRouterEmbeddingClient:
         self._referer = referer
         self._title = title
         self._timeout_seconds = timeout_seconds
+        self._batch_size = max(1, batch_size)
+        self._concurrency = max(1, concurrency)
+        # Bounds the shared cache whenever this instance adds to it.
+        self._query_cache_size = max(0, query_cache_size)
 
     @classmethod
     def from_settings(cls) -> "OpenRouterEmbeddingClient":
+        openrouter = settings.openrouter
         return cls(
-            api_key=getattr(settings, "OPENROUTER_API_KEY", None),
-            model=getattr(
-                settings, "OPENROUTER_EMBED_MODEL", "openai/text-embedding-3-large"
-            ),
-            base_url=getattr(settings, "OPENROUTER_EMBED_URL", None),
-            referer=getattr(settings, "OPENROUTER_HTTP_REFERER", None),
-            title=getattr(settings, "OPENROUTER_APP_TITLE", None) or settings.APP_NAME,
-            timeout_seconds=float(
-                getattr(settings, "OPENROUTER_TIMEOUT_SECONDS", 30.0)
-            ),
+            api_key=openrouter.OPENROUTER_API_KEY,
+            model=openrouter.OPENROUTER_EMBED_MODEL,
+            base_url=openrouter.OPENROUTER_EMBED_URL,
+            referer=openrouter.OPENROUTER_HTTP_REFERER,
+            title=openrouter.OPENROUTER_APP_TITLE or settings.APP_NAME,
+            timeout_seconds=float(openrouter.OPENROUTER_TIMEOUT_SECONDS),
+            batch_size=openrouter.OPENROUTER_EMBED_BATCH_SIZE,
+            concurrency=openrouter.OPENROUTER_EMBED_CONCURRENCY,
+            query_cache_size=openrouter.OPENROUTER_EMBED_QUERY_CACHE_SIZE,
         )
 
     @property
     def is_enabled(self) -> bool:
         return bool(self._api_key)
 
+    async def embed_queries(self, texts: Sequence[str]) -> list[list[float]]:
+        """Embed search queries, reusing vectors for recently seen texts.
+
+        Document chunks go through ``embed_texts``; they are rarely repeated
+        and would only churn the cache.
+        """
+        keys = [(self._model, " ".join(text.split())) for text in texts]
+        if not self._query_cache_size:
+            return await self.embed_texts([text for _, text in keys])
+
+        found = {key: _query_cache[key] for key in keys if key in _query_cache}
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            embeddings = await self.embed_texts([text for _, text in missing])
+            for key, embedding in zip(missing, embeddings, strict=True):
+                found[key] = _query_cache[key] = array("f", embedding)
+
+        # Concurrent calls may have evicted keys found above while this one
+        # awaited the API, so they are re-inserted rather than just moved.
+        for key, vector in found.items():
+            _query_cache[key] = vector
+            _query_cache.move_to_end(key)
+        while len(_query_cache) > self._query_cache_size:
+            _query_cache.popitem(last=False)
+
+        return [found[key].tolist() for key in keys]
+
     async def embed_texts(self, texts: Sequence[str]) -> list[list[float]]:
         if not texts:
             return []
@@ -54,11 +97,6 @@ class OpenRouterEmbeddingClient:
         if not self.is_enabled:
             raise RuntimeError("OpenRouter API key is not configured")
 
-        payload = {
-            "model": self._model,
-            "input": list(texts),
-        }
-
         headers = {
             "Authorization": f"Bearer {self._api_key}",
             "Content-Type": "application/json",
@@ -69,8 +107,35 @@ class OpenRouterEmbeddingClient:
         if self._title:
             headers["X-Title"] = self._title
 
+        # Large documents are embedded in fixed-size batches, a few in flight
+        # at once over one connection pool, instead of one oversized request.
+        batches = [
+            texts[i : i + self._batch_size]
+            for i in range(0, len(texts), self._batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self._concurrency)
+
         async with httpx.AsyncClient(timeout=self._timeout_seconds) as client:
-            response = await client.post(self._base_url, json=payload, headers=headers)
+
+            async def embed_batch(batch: Sequence[str]) -> list[list[float]]:
+                async with semaphore:
+                    return await self._embed_batch(client, headers, batch)
+
+            results = await asyncio.gather(*(embed_batch(b) for b in batches))
+
+        return [embedding for batch in results for embedding in batch]
+
+    async def _embed_batch(
+        self,
+        client: httpx.AsyncClient,
+        headers: dict[str, str],
+        texts: Sequence[str],
+    ) -> list[list[float]]:
+        payload = {
+            "model": self._model,
+            "input": list(texts),
+        }
+        response = await client.post(self._base_url, json=payload, headers=headers)
 
         try:
             response.raise_for_status()
@@ -82,7 +147,11 @@ class OpenRouterEmbeddingClient:
             raise
 
         data = response.json()
-        embeddings = [item["embedding"] for item in data.get("data", [])]
+        items = data.get("data", [])
+        # OpenAI-compatible APIs tag each vector with its input index.
+        if all("index" in item for item in items):
+            items = sorted(items, key=lambda item: item["index"])
+        embeddings = [item["embedding"] for item in items]
 
         if not embeddings:
             raise RuntimeError("OpenRouter returned no embeddings")
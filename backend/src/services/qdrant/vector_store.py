@@ -13,6 +13,7 @@ from qdrant_client.http.models import (
     MatchAny,
     MatchValue,
     PointStruct,
+    QueryRequest,
     VectorParams,
 )
 
@@ -212,22 +213,11 @@ class QdrantVectorStore:
         if not self.is_enabled or not self._client:
             return []
 
-        filter_conditions = [
-            FieldCondition(key="user_id", match=MatchValue(value=user_id))
-        ]
-
-        if document_ids:
-            filter_conditions.append(
-                FieldCondition(
-                    key="document_id",
-                    match=MatchAny(any=[int(doc_id) for doc_id in document_ids]),
-                )
-            )
-
-        if extra_filter_conditions:
-            filter_conditions.extend(extra_filter_conditions)
-
-        qdrant_filter = Filter(must=filter_conditions)
+        qdrant_filter = self._search_filter(
+            user_id=user_id,
+            document_ids=document_ids,
+            extra_filter_conditions=extra_filter_conditions,
+        )
 
         results = await self._client.search(
             collection_name=self._collection_name,
@@ -247,3 +237,57 @@ class QdrantVectorStore:
             if getattr(point, "score", 0.0) >= score_threshold
         ]
         return filtered_results
+
+    async def search_document_embeddings_batch(
+        self,
+        *,
+        user_id: int,
+        query_embeddings: Sequence[Sequence[float]],
+        limit: int,
+        score_threshold: float | None = None,
+        document_ids: Sequence[int] | None = None,
+    ):
+        """Run one search per embedding in a single Qdrant request."""
+        if not self.is_enabled or not self._client or not query_embeddings:
+            return [[] for _ in query_embeddings]
+
+        qdrant_filter = self._search_filter(user_id=user_id, document_ids=document_ids)
+        responses = await self._client.query_batch_points(
+            collection_name=self._collection_name,
+            requests=[
+                QueryRequest(
+                    query=list(embedding),
+                    filter=qdrant_filter,
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    with_payload=True,
+                    with_vector=False,
+                )
+                for embedding in query_embeddings
+            ],
+        )
+        return [response.points for response in responses]
+
+    def _search_filter(
+        self,
+        *,
+        user_id: int,
+        document_ids: Sequence[int] | None = None,
+        extra_filter_conditions: Sequence[FieldCondition] | None = None,
+    ) -> Filter:
+        filter_conditions = [
+            FieldCondition(key="user_id", match=MatchValue(value=user_id))
+        ]
+
+        if document_ids:
+            filter_conditions.append(
+                FieldCondition(
+                    key="document_id",
+                    match=MatchAny(any=[int(doc_id) for doc_id in document_ids]),
+                )
+            )
+
+        if extra_filter_conditions:
+            filter_conditions.extend(extra_filter_conditions)
+
+        return Filter(must=filter_conditions)
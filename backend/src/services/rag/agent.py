@@ -1,20 +1,23 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import heapq
 import math
+import re
 import time
 from datetime import date, datetime, timezone
 from decimal import Decimal
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from types import SimpleNamespace
-from typing import Any, Sequence
+from typing import Any, Awaitable, Callable, Sequence
 
+import orjson
 import structlog
 from qdrant_client.http.models import FieldCondition, MatchValue
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
-from db.models import ParsedDocument, User
+from db.models import MessageType, ParsedDocument, User
 from db.repositories.document_repo import ParsedDocumentRepository
 from db.repositories.message_repo import MessageRepository
 from services.document_processing.vector_manager import (
@@ -31,6 +34,8 @@ from services.rag.configuration import (
 from services.rag.external_clients import CentralBankClient, TavilyClient
 from services.rag.fusion_planner import FusionPlanner, FusionPlan
 from services.rag.openrouter_chat import OpenRouterChatClient
+from services.rag.prompt_registry import load_prompt
+from services.rag.response_cache import SemanticResponseCache
 from services.rag.tool_registry import (
     ToolContext,
     ToolDefinition,
@@ -44,6 +49,35 @@ from services.rag.context_manager import TokenAwareContextManager
 
 logger = structlog.get_logger(__name__)
 
+TokenCallback = Callable[[str], Awaitable[None]]
+
+# Default answer format, used when the chat prompt has no instructions of its
+# own; specific formatting lives in the system prompt.
+_ANSWER_FORMAT_INSTRUCTIONS = (
+    "Адаптируй формат ответа под сложность вопроса:\n"
+    "- Простой вопрос: краткий прямой ответ (1-3 абзаца).\n"
+    "- Средней сложности: структура с разделами 'Ответ' и 'Источники'.\n"
+    "- Сложный вопрос: полная структура с 'Краткий вывод', 'Подробный анализ', 'Источники'.\n"
+    "\nИсточники указывай строго в формате:\n"
+    "- [Название файла](URL) — для документов пользователя\n"
+    "- [Финансовая база знаний] — для корпоративной БЗ\n"
+    "- [cbr.ru] — для данных ЦБ РФ\n"
+    "- [Название статьи](URL) — для веб-поиска\n"
+    "\nНЕ используй технические термины типа 'Tavily API', 'чанк', 'векторный поиск'."
+)
+
+# Search triggers for the rule-based scenario guess, matched as substrings
+# in one case-insensitive scan.
+_SEARCH_KEYWORDS_RE = re.compile(
+    "найти|найди|ищи|поиск|где|какой договор|какой документ|покажи|подбери",
+    re.IGNORECASE,
+)
+
+
+# Numbers, dates and currency codes in a query; questions that differ in
+# these embed almost identically but must not share a cached answer.
+_QUERY_ENTITIES_RE = re.compile(r"\d+(?:[.,/-]\d+)*|\b[A-Z]{3}\b")
+
 
 @dataclass
 class AgentResult:
@@ -87,6 +121,11 @@ class RagAgent:
         self._score_threshold = self._config.default_score_threshold
         self._rrf_k = self._config.rrf_k
         self._kb_settings = self._config.knowledge_base
+        self._system_prompt = load_prompt("system_ru.txt")
+        self._orchestrator_prompt = load_prompt("orchestrator_ru.txt")
+        # One shared dict keeps the leading system message identical across
+        # every call, which the provider-side prompt cache keys on.
+        self._system_message = {"role": "system", "content": self._system_prompt}
         self._kb_embeddings = OpenRouterEmbeddingClient.from_settings()
         self._kb_store = QdrantVectorStore(
             url=getattr(settings, "QDRANT_URL", None),
@@ -99,15 +138,23 @@ class RagAgent:
             history_tail=self._config.orchestrator_history_tail,
         )
         self._tool_registry = self._build_tool_registry()
+        self._response_cache = SemanticResponseCache(
+            embedder=self._kb_embeddings,
+            threshold=float(settings.RAG_SEMANTIC_CACHE_THRESHOLD),
+            ttl_seconds=int(settings.RAG_SEMANTIC_CACHE_TTL_SECONDS),
+            max_entries=int(settings.RAG_SEMANTIC_CACHE_MAX_ENTRIES),
+        )
         self._cbr_client = CentralBankClient(
             base_url=settings.CBR_API_BASE_URL,
             cache_ttl_seconds=int(settings.CBR_CACHE_TTL_SECONDS),
+            cache_max_entries=int(settings.CBR_CACHE_MAX_ENTRIES),
         )
         self._tavily_client = TavilyClient(
             api_key=settings.TAVILY_API_KEY,
             base_url=settings.TAVILY_BASE_URL,
             timeout_seconds=float(settings.TAVILY_TIMEOUT_SECONDS),
             cache_ttl_seconds=int(settings.TAVILY_CACHE_TTL_SECONDS),
+            cache_max_entries=int(settings.TAVILY_CACHE_MAX_ENTRIES),
         )
 
         # Initialize parallel executor with retry logic
@@ -129,6 +176,13 @@ class RagAgent:
             ),
         )
 
+    def start_background_tasks(self) -> None:
+        if settings.CBR_KEY_RATE_BACKGROUND_REFRESH:
+            self._cbr_client.start_background_refresh()
+
+    async def aclose(self) -> None:
+        await asyncio.gather(self._cbr_client.aclose(), self._tavily_client.aclose())
+
     async def run(
         self,
         *,
@@ -138,16 +192,121 @@ class RagAgent:
         chat_id: int | None = None,
         selected_document_ids: Sequence[int] | None = None,
         answer_instructions: str | None = None,
+        on_token: TokenCallback | None = None,
     ) -> AgentResult:
-        current_dt = datetime.now(timezone.utc)
-        current_dt_iso = current_dt.isoformat()
-        history = await self._load_chat_history(db, chat_id) if chat_id else []
-        decision = await self._choose_scenario(
+        """Answer ``query``; with ``on_token`` the final answer is streamed.
+
+        Streamed deltas are provisional (a model may write text before
+        deciding to call a tool); the returned ``AgentResult.answer`` is the
+        authoritative text.
+        """
+        # The query embedding for the response cache is fetched while the
+        # history loads; the session itself is only used by this coroutine.
+        vector_task = asyncio.create_task(self._response_cache.embed(query))
+        try:
+            history = await self._load_chat_history(db, chat_id) if chat_id else []
+        except BaseException:
+            vector_task.cancel()
+            raise
+        query_vector = await vector_task
+
+        scope = self._response_cache_scope(
+            user=user,
             query=query,
             history=history,
             selected_ids=selected_document_ids,
-            current_datetime=current_dt_iso,
+            answer_instructions=answer_instructions,
+        )
+        cached, similarity = (
+            self._response_cache.lookup(scope, query_vector)
+            if query_vector is not None
+            else (None, 0.0)
+        )
+        if cached is not None:
+            logger.info("semantic-cache-hit", similarity=round(similarity, 4))
+            return AgentResult(
+                answer=cached.answer,
+                used_chunks=[],
+                scenario=cached.scenario,
+                debug={**cached.debug, "semantic_cache_similarity": similarity},
+            )
+
+        result = await self._answer(
+            db=db,
+            user=user,
+            query=query,
+            history=history,
+            selected_document_ids=selected_document_ids,
+            answer_instructions=answer_instructions,
+            on_token=on_token,
+        )
+        if query_vector is not None and "vector_search_error" not in result.debug:
+            # The chunks hold ORM objects bound to this request's session.
+            self._response_cache.store(
+                scope, query_vector, replace(result, used_chunks=[])
+            )
+        return result
+
+    def _response_cache_scope(
+        self,
+        *,
+        user: User,
+        query: str,
+        history: list[dict[str, str]],
+        selected_ids: Sequence[int] | None,
+        answer_instructions: str | None,
+    ) -> tuple[Any, ...]:
+        # The history is loaded after the new user message is stored, so it
+        # usually ends with the query itself; that part is matched by
+        # similarity, except for its numbers and codes, which must be equal.
+        if history and history[-1] == {"role": "user", "content": query}:
+            history = history[:-1]
+        return (
+            user.user_id,
+            tuple(sorted(selected_ids or ())),
+            answer_instructions,
+            tuple(_QUERY_ENTITIES_RE.findall(query)),
+            hash(tuple((item["role"], item["content"]) for item in history)),
+        )
+
+    async def _answer(
+        self,
+        *,
+        db: AsyncSession,
+        user: User,
+        query: str,
+        history: list[dict[str, str]],
+        selected_document_ids: Sequence[int] | None,
+        answer_instructions: str | None,
+        on_token: TokenCallback | None = None,
+    ) -> AgentResult:
+        current_dt = datetime.now(timezone.utc)
+        current_dt_iso = current_dt.isoformat()
+        # Selected documents are sized while the orchestrator call is in
+        # flight. If the call fails the query is cancelled and awaited, so
+        # the session is never left with a running statement.
+        documents_task = (
+            asyncio.create_task(
+                ParsedDocumentRepository(db).get_total_content_length(
+                    list(selected_document_ids)
+                )
+            )
+            if selected_document_ids
+            else None
         )
+        try:
+            decision = await self._choose_scenario(
+                query=query,
+                history=history,
+                selected_ids=selected_document_ids,
+                current_datetime=current_dt_iso,
+            )
+        except BaseException:
+            if documents_task:
+                documents_task.cancel()
+                await asyncio.gather(documents_task, return_exceptions=True)
+            raise
+        documents_len = await documents_task if documents_task else 0
         scenario = decision.scenario
 
         used_chunks: list[VectorSearchResult] = []
@@ -169,7 +328,10 @@ class RagAgent:
         if decision.follow_up:
             scenario = 5
             answer = await self._ask_clarification(
-                query=query, history=history, clarifications=decision.clarifications
+                query=query,
+                history=history,
+                clarifications=decision.clarifications,
+                on_token=on_token,
             )
             return AgentResult(
                 answer=answer, used_chunks=used_chunks, scenario=scenario, debug=debug
@@ -177,29 +339,40 @@ class RagAgent:
 
         instructions = self._resolve_instructions(answer_instructions)
 
-        scenario, precomputed_debug = await self._adjust_scenario_for_documents(
-            db=db,
+        scenario, precomputed_debug = self._adjust_scenario_for_documents(
             selected_ids=selected_document_ids,
             scenario=scenario,
+            total_len=documents_len,
         )
         debug.update(precomputed_debug)
 
-        allowed_tools = self._tools_for_scenario(scenario, decision.intent)
+        # Document intents follow the size-adjusted scenario: the full-text
+        # tool only exists in scenario 3, search only in scenario 4.
+        intent = decision.intent
+        if "selected_docs" in precomputed_debug and intent in {
+            None,
+            "full_docs",
+            "document_search",
+        }:
+            intent = "full_docs" if scenario == 3 else "document_search"
+
+        allowed_tools = self._tools_for_scenario(scenario, intent)
 
         # Handle predefined responses for specific intents
-        if decision.intent in {"small_talk", "off_topic"}:
-            answer = self._get_predefined_response(decision.intent, query)
+        if intent in {"small_talk", "off_topic"}:
+            answer = self._get_predefined_response(intent, query)
             return AgentResult(
                 answer=answer, used_chunks=used_chunks, scenario=scenario, debug=debug
             )
 
         if scenario == 5 or (
-            not allowed_tools
-            and decision.intent != "small_talk"
-            and decision.intent != "off_topic"
+            not allowed_tools and intent != "small_talk" and intent != "off_topic"
         ):
             answer = await self._ask_clarification(
-                query=query, history=history, clarifications=decision.clarifications
+                query=query,
+                history=history,
+                clarifications=decision.clarifications,
+                on_token=on_token,
             )
         else:
             try:
@@ -212,8 +385,9 @@ class RagAgent:
                     db=db,
                     user=user,
                     selected_ids=selected_document_ids,
-                    intent=decision.intent,
+                    intent=intent,
                     current_datetime=current_dt_iso,
+                    on_token=on_token,
                 )
                 debug["tool_calls"] = tool_usage
             except VectorSearchError as exc:
@@ -228,12 +402,14 @@ class RagAgent:
     async def _load_chat_history(
         self, db: AsyncSession, chat_id: int
     ) -> list[dict[str, str]]:
+        # The only place history is bounded by messages_limit; the tool
+        # conversation and the clarification prompt use it unsliced.
         msgs = await MessageRepository(db).get_last_for_chat(
             chat_id=chat_id, limit=self._messages_limit
         )
         history: list[dict[str, str]] = []
         for m in msgs:
-            role = "assistant" if m.message_type.name == "MODEL" else "user"
+            role = "assistant" if m.message_type is MessageType.MODEL else "user"
             history.append({"role": role, "content": m.content})
         return history
 
@@ -245,43 +421,49 @@ class RagAgent:
         selected_ids: Sequence[int] | None,
         current_datetime: str,
     ) -> ScenarioDecision:
-        from pathlib import Path
-
-        base = Path(__file__).with_suffix("").parent / "prompt_storage"
-        system_prompt = (base / "system_ru.txt").read_text(encoding="utf-8")
-        orchestrator_prompt = (base / "orchestrator_ru.txt").read_text(encoding="utf-8")
-
         rule_guess = self._rule_guess_scenario(
             query=query, history=history, selected_ids=selected_ids
         )
-        sys_msg = {"role": "system", "content": system_prompt}
-        orch_msg = {"role": "system", "content": orchestrator_prompt}
-        user_msg = {
-            "role": "user",
-            "content": json.dumps(
-                {
-                    "query": query,
-                    "selected_document_ids": list(selected_ids or []),
-                    "has_history": bool(history),
-                    "rule_guess": rule_guess,
-                    "history_messages": len(history),
-                    "current_datetime": current_datetime,
-                },
-                ensure_ascii=False,
-            ),
-        }
+        if self._rule_is_confident(query=query, selected_ids=selected_ids):
+            return ScenarioDecision(
+                scenario=rule_guess,
+                confidence=1.0,
+                reason="rule shortcut",
+                follow_up=False,
+                clarifications=[],
+                use_query_expansion=None,
+                rule_guess=rule_guess,
+                raw_response=None,
+                intent=None,
+            )
+
+        user_content = orjson.dumps(
+            {
+                "query": query,
+                "selected_document_ids": list(selected_ids or []),
+                "has_history": bool(history),
+                "rule_guess": rule_guess,
+                "history_messages": len(history),
+                "current_datetime": current_datetime,
+            }
+        ).decode()
 
         history_tail = self._config.orchestrator_history_tail
-        messages = [sys_msg, orch_msg, *history[-history_tail:], user_msg]
+        messages = self._build_messages(
+            user_content,
+            history[-history_tail:],
+            system_extras=(self._orchestrator_prompt,),
+        )
         prompt_params = self._config.prompts.orchestrator
         resp = await self._chat.chat(
             messages=messages,
             **self._prompt_kwargs(prompt_params),
             response_format={"type": "json_object"},
+            stop_after_json=True,
         )
         try:
             content = resp["choices"][0]["message"]["content"]
-            parsed = json.loads(content)
+            parsed = orjson.loads(content)
             llm_scenario = int(parsed.get("scenario", 3))
             confidence = float(parsed.get("confidence", 0.5))
             threshold = self._config.orchestrator_confidence_threshold
@@ -318,6 +500,16 @@ class RagAgent:
             )
         return decision
 
+    def _rule_is_confident(
+        self, *, query: str, selected_ids: Sequence[int] | None
+    ) -> bool:
+        # With documents selected the orchestrator prompt picks scenario 3
+        # (full_docs) or 4 (document_search) by size alone, which
+        # _adjust_scenario_for_documents decides from the real lengths, so
+        # its LLM round-trip is skipped. Very short queries still go to it: greetings and
+        # fragments may need small_talk handling or a clarification.
+        return bool(selected_ids) and len(query.split()) >= 3
+
     def _rule_guess_scenario(
         self,
         *,
@@ -327,34 +519,22 @@ class RagAgent:
     ) -> int:
         if selected_ids and len(selected_ids) > 0:
             return 3
-        q = (query or "").lower()
-        search_keywords = (
-            "найти",
-            "найди",
-            "ищи",
-            "поиск",
-            "где",
-            "какой договор",
-            "какой документ",
-            "покажи",
-            "подбери",
-        )
-        if any(k in q for k in search_keywords):
+        q = query or ""
+        if _SEARCH_KEYWORDS_RE.search(q):
             return 1
         if not q.strip():
             return 5
         return 2
 
-    async def _adjust_scenario_for_documents(
+    def _adjust_scenario_for_documents(
         self,
         *,
-        db: AsyncSession,
         selected_ids: Sequence[int] | None,
         scenario: int,
+        total_len: int,
     ) -> tuple[int, dict[str, Any]]:
         debug: dict[str, Any] = {}
         if scenario in {3, 4} and selected_ids:
-            docs, total_len = await self._load_documents(db, selected_ids)
             debug["selected_docs"] = {
                 "ids": list(selected_ids),
                 "total_length": total_len,
@@ -415,6 +595,7 @@ class RagAgent:
         selected_ids: Sequence[int] | None,
         intent: str | None,
         current_datetime: str,
+        on_token: TokenCallback | None = None,
     ) -> tuple[str, list[VectorSearchResult], list[dict[str, Any]]]:
         messages = self._build_tool_messages(
             scenario=scenario,
@@ -449,6 +630,7 @@ class RagAgent:
                 messages=messages,
                 tools=tool_specs,
                 tool_choice="auto",
+                on_token=on_token,
             )
             message = response["choices"][0]["message"]
             role = message.get("role", "assistant")
@@ -511,10 +693,8 @@ class RagAgent:
                                         "role": "tool",
                                         "tool_call_id": call.get("id"),
                                         "name": name,
-                                        "content": json.dumps(
-                                            result.content,
-                                            ensure_ascii=False,
-                                            default=self._json_default,
+                                        "content": self._dump_tool_content(
+                                            result.content
                                         ),
                                     }
                                 )
@@ -543,9 +723,8 @@ class RagAgent:
                                         "role": "tool",
                                         "tool_call_id": call.get("id"),
                                         "name": name,
-                                        "content": json.dumps(
-                                            {"status": "error", "message": error_msg},
-                                            ensure_ascii=False,
+                                        "content": self._dump_tool_content(
+                                            {"status": "error", "message": error_msg}
                                         ),
                                     }
                                 )
@@ -584,11 +763,7 @@ class RagAgent:
                                     "role": "tool",
                                     "tool_call_id": call.get("id"),
                                     "name": name,
-                                    "content": json.dumps(
-                                        result.content,
-                                        ensure_ascii=False,
-                                        default=self._json_default,
-                                    ),
+                                    "content": self._dump_tool_content(result.content),
                                 }
                             )
                         except Exception as exc:
@@ -601,9 +776,8 @@ class RagAgent:
                                     "role": "tool",
                                     "tool_call_id": call.get("id"),
                                     "name": name,
-                                    "content": json.dumps(
-                                        {"status": "error", "message": str(exc)},
-                                        ensure_ascii=False,
+                                    "content": self._dump_tool_content(
+                                        {"status": "error", "message": str(exc)}
                                     ),
                                 }
                             )
@@ -615,6 +789,12 @@ class RagAgent:
 
         raise RuntimeError("tool loop exceeded maximum iterations")
 
+    @classmethod
+    def _dump_tool_content(cls, content: Any) -> str:
+        return orjson.dumps(
+            content, default=cls._json_default, option=orjson.OPT_NON_STR_KEYS
+        ).decode()
+
     @staticmethod
     def _json_default(obj: Any) -> Any:
         if isinstance(obj, (datetime, date)):
@@ -640,11 +820,6 @@ class RagAgent:
         Build message list for tool-based conversation with token-aware optimization.
         Includes system prompt, guidance, history, and structured user request.
         """
-        from pathlib import Path
-
-        base = Path(__file__).with_suffix("").parent / "prompt_storage"
-        system_prompt = (base / "system_ru.txt").read_text(encoding="utf-8")
-
         # Adaptive guidance based on scenario and intent
         guidance = self._build_guidance_message(
             scenario=scenario,
@@ -667,7 +842,7 @@ class RagAgent:
 
         if use_token_aware:
             messages, stats = self._context_manager.build_optimal_context(
-                system_prompt=system_prompt,
+                system_prompt=self._system_prompt,
                 guidance=guidance,
                 history=history,
                 user_query=user_payload,
@@ -685,13 +860,9 @@ class RagAgent:
             return messages
         else:
             # Fallback to original simple truncation
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "system", "content": guidance},
-            ]
-            messages.extend(history[-self._messages_limit :])
-            messages.append({"role": "user", "content": user_payload})
-            return messages
+            return self._build_messages(
+                user_payload, history, system_extras=(guidance,)
+            )
 
     def _build_guidance_message(
         self, *, scenario: int, intent: str | None, current_datetime: str
@@ -710,7 +881,7 @@ class RagAgent:
         intent_guidance = {
             "document_search": "Используй search_user_documents для поиска в документах пользователя.",
             "knowledge_base": "Используй search_general_kb для поиска в корпоративной базе знаний.",
-            "cbr_rate": "Используй fetch_cbr_data для получения курсов валют или ключевой ставки ЦБ РФ.",
+            "cbr_rate": "Используй fetch_cbr_data для получения курсов валют или ключевой ставки ЦБ РФ; если нужны и ставка, и курс, запроси их одним вызовом через modes.",
             "finance_news": "Используй fetch_finance_news для поиска актуальных финансовых новостей.",
             "hybrid_kb_docs": "Используй И search_general_kb, И search_user_documents для полного ответа.",
             "full_docs": "Используй load_documents_full для загрузки полного контекста документов.",
@@ -720,7 +891,7 @@ class RagAgent:
         if specific:
             base_guidance += f"{specific}\n\n"
 
-        base_guidance += f"Формат ответа:\n{self._answer_format_instructions()}"
+        base_guidance += f"Формат ответа:\n{_ANSWER_FORMAT_INSTRUCTIONS}"
         return base_guidance
 
     def _build_user_request(
@@ -808,7 +979,7 @@ class RagAgent:
         document_ids: Sequence[int] | None,
         history: list[dict[str, str]],
     ) -> tuple[list[VectorSearchResult], dict[str, Any]]:
-        from services.document_service import search_document_chunks
+        from services.document_service import search_document_chunks_many
 
         plan = await self._generate_fusion_plan(
             query=query, history=history, selected_ids=document_ids
@@ -826,19 +997,18 @@ class RagAgent:
             }
 
         per_query = max(2, math.ceil(self._top_k / len(expansions)))
-        results_by_query: list[list[VectorSearchResult]] = []
         start = time.perf_counter()
         try:
-            for q in expansions:
-                r = await search_document_chunks(
-                    db=db,
-                    user=user,
-                    query=q,
-                    limit=per_query,
-                    score_threshold=self._score_threshold,
-                    document_ids=document_ids,
-                )
-                results_by_query.append(list(r))
+            # One embedding request and one Qdrant query_batch_points request
+            # for all expansions instead of a round-trip pair per query.
+            results_by_query = await search_document_chunks_many(
+                db=db,
+                user=user,
+                queries=expansions,
+                limit=per_query,
+                score_threshold=self._score_threshold,
+                document_ids=document_ids,
+            )
         except Exception as exc:  # pragma: no cover - network/infra issues
             logger.error("vector-search-expansion-failed", reason=str(exc))
             raise VectorSearchError(
@@ -949,181 +1119,33 @@ class RagAgent:
         # Fallback
         return "Пожалуйста, уточните ваш вопрос."
 
-    def _answer_format_instructions(self) -> str:
-        """
-        Return adaptive format instructions based on query complexity.
-        These are general instructions - specific formatting is in system prompt.
-        """
-        return (
-            "Адаптируй формат ответа под сложность вопроса:\n"
-            "- Простой вопрос: краткий прямой ответ (1-3 абзаца).\n"
-            "- Средней сложности: структура с разделами 'Ответ' и 'Источники'.\n"
-            "- Сложный вопрос: полная структура с 'Краткий вывод', 'Подробный анализ', 'Источники'.\n"
-            "\nИсточники указывай строго в формате:\n"
-            "- [Название файла](URL) — для документов пользователя\n"
-            "- [Финансовая база знаний] — для корпоративной БЗ\n"
-            "- [cbr.ru] — для данных ЦБ РФ\n"
-            "- [Название статьи](URL) — для веб-поиска\n"
-            "\nНЕ используй технические термины типа 'Tavily API', 'чанк', 'векторный поиск'."
-        )
-
     def _rrf_merge(
         self, *, results_by_query: list[list[VectorSearchResult]], k: int, limit: int
     ) -> list[VectorSearchResult]:
-        # Reciprocal Rank Fusion across multiple query result lists
-        rank_maps: list[dict[int, int]] = []
-        for lst in results_by_query:
-            rank_map: dict[int, int] = {}
-            for idx, res in enumerate(lst):
-                rank_map[res.chunk.chunk_id] = idx + 1  # ranks start at 1
-            rank_maps.append(rank_map)
-
+        # Reciprocal Rank Fusion across multiple query result lists:
+        # sum 1/(k+rank) per list, keep the best scoring instance of each chunk
+        # to carry payload and text.
         fused_scores: dict[int, float] = {}
         best_result_for_chunk: dict[int, VectorSearchResult] = {}
         for lst in results_by_query:
-            for idx, res in enumerate(lst):
+            for rank, res in enumerate(lst, start=k + 1):
                 cid = res.chunk.chunk_id
-                # use min rank across lists where chunk appears; sum 1/(k+rank) per list
-                score_sum = fused_scores.get(cid, 0.0)
-                rank = idx + 1
-                score_sum += 1.0 / (k + rank)
-                fused_scores[cid] = score_sum
-                # keep the best scoring instance to carry payload and text
-                if (
-                    cid not in best_result_for_chunk
-                    or res.score > best_result_for_chunk[cid].score
-                ):
+                fused_scores[cid] = fused_scores.get(cid, 0.0) + 1.0 / rank
+                best = best_result_for_chunk.get(cid)
+                if best is None or res.score > best.score:
                     best_result_for_chunk[cid] = res
 
-        fused = [
-            (cid, score, best_result_for_chunk[cid])
-            for cid, score in fused_scores.items()
-        ]
-        fused.sort(key=lambda x: x[1], reverse=True)
-        top_results: list[VectorSearchResult] = []
-        for _, _, res in fused[:limit]:
-            top_results.append(res)
-        return top_results
+        # nlargest keeps the stable order of sorted(reverse=True)[:limit]
+        # without sorting every fused chunk.
+        top_ids = heapq.nlargest(limit, fused_scores, key=fused_scores.__getitem__)
+        return [best_result_for_chunk[cid] for cid in top_ids]
 
     def _resolve_instructions(self, custom_value: str | None) -> str:
         if custom_value:
             stripped = custom_value.strip()
             if stripped:
                 return stripped
-        return self._answer_format_instructions()
-
-    async def _answer_with_full_context(
-        self,
-        *,
-        query: str,
-        history: list[dict[str, str]],
-        documents: Sequence[ParsedDocument],
-        instructions: str,
-    ) -> str:
-        from pathlib import Path
-
-        base = Path(__file__).with_suffix("").parent / "prompt_storage"
-        system_prompt = (base / "system_ru.txt").read_text(encoding="utf-8")
-
-        context_parts: list[str] = []
-        for idx, d in enumerate(documents, start=1):
-            name = d.filename or f"Документ {d.document_id}"
-            url = d.minio_url or "н/д"
-            created = (
-                d.created_at.isoformat() if getattr(d, "created_at", None) else "н/д"
-            )
-            content = d.content or ""
-            link_display = (
-                f"[Открыть документ]({url})" if url != "н/д" else "ссылка недоступна"
-            )
-            snippet = (
-                f"### Документ {idx}: {name} (ID {d.document_id})\n"
-                f"- Ссылка: {link_display}\n"
-                f"- Дата загрузки: {created}\n"
-                f"- Объём: {len(content)} символов\n\n"
-                f"```markdown\n{content}\n```"
-            )
-            context_parts.append(snippet)
-        context = "\n\n---\n\n".join(context_parts)
-
-        user_content = (
-            f"Вопрос клиента: {query}\n\n"
-            f"Инструкции по ответу:\n{instructions}\n\n"
-            "Ниже приведён контекст выбранных документов в формате Markdown. Используй его для ссылок и цитирования."
-            f"\n\n{context}"
-        )
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            *history[-self._messages_limit :],
-            {"role": "user", "content": user_content},
-        ]
-        prompt_params = self._config.prompts.full_context_answer
-        resp = await self._chat.chat(
-            messages=messages,
-            **self._prompt_kwargs(prompt_params),
-        )
-        return resp["choices"][0]["message"]["content"]
-
-    async def _answer_with_chunks(
-        self,
-        *,
-        query: str,
-        history: list[dict[str, str]],
-        chunks: Sequence[VectorSearchResult],
-        instructions: str,
-    ) -> str:
-        from pathlib import Path
-
-        base = Path(__file__).with_suffix("").parent / "prompt_storage"
-        system_prompt = (base / "system_ru.txt").read_text(encoding="utf-8")
-
-        snippets: list[str] = []
-        for idx, r in enumerate(chunks, start=1):
-            payload = r.payload or {}
-            title = (
-                payload.get("filename")
-                or f"Документ {payload.get('document_id', 'н/д')}"
-            )
-            doc_id = payload.get("document_id")
-            serial = r.chunk.chunk_serial
-            url = (
-                payload.get("minio_url")
-                or (payload.get("document_metadata") or {}).get("minio_url")
-                or "н/д"
-            )
-            snippet_text = r.chunk.chunk_content.strip()
-            link_display = (
-                f"[{title}]({url})" if url != "н/д" else f"{title} (ссылка недоступна)"
-            )
-            snippet_block = (
-                f"### Источник {idx}: {title} (Документ {doc_id}, чанк {serial})"
-                f"\n- Ссылка: {link_display}"
-                f"\n- Оценка сходства: {r.score:.3f}"
-                f"\n- Чанк: {serial}"
-                f"\n\n```markdown\n{snippet_text}\n```"
-            )
-            snippets.append(snippet_block)
-        context = "\n\n---\n\n".join(snippets)
-
-        user_content = (
-            f"Вопрос клиента: {query}\n\n"
-            f"Инструкции по ответу:\n{instructions}\n\n"
-            "Ниже приведены релевантные фрагменты документов с метаданными. Используй их и укажи ссылки на источники в формате [[Источник: …]]."
-            f"\n\n{context}"
-        )
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            *history[-self._messages_limit :],
-            {"role": "user", "content": user_content},
-        ]
-        prompt_params = self._config.prompts.chunk_answer
-        resp = await self._chat.chat(
-            messages=messages,
-            **self._prompt_kwargs(prompt_params),
-        )
-        return resp["choices"][0]["message"]["content"]
+        return _ANSWER_FORMAT_INSTRUCTIONS
 
     def _vector_search_unavailable_message(self) -> str:
         return (
@@ -1131,48 +1153,14 @@ class RagAgent:
             "Пожалуйста, повторите запрос чуть позже или сообщите администратору, если проблема сохраняется."
         )
 
-    async def _answer_general(
-        self,
-        *,
-        query: str,
-        history: list[dict[str, str]],
-        instructions: str,
-    ) -> str:
-        from pathlib import Path
-
-        base = Path(__file__).with_suffix("").parent / "prompt_storage"
-        system_prompt = (base / "system_ru.txt").read_text(encoding="utf-8")
-
-        user_content = (
-            f"Вопрос клиента: {query}\n\n"
-            f"Инструкции по ответу:\n{instructions}\n\n"
-            "Используй последние сообщения чата (выше) для контекста. Если источников нет, всё равно сохрани требуемую структуру и поясни отсутствие ссылок."
-        )
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            *history[-self._messages_limit :],
-            {"role": "user", "content": user_content},
-        ]
-        prompt_params = self._config.prompts.general_answer
-        resp = await self._chat.chat(
-            messages=messages,
-            **self._prompt_kwargs(prompt_params),
-        )
-        return resp["choices"][0]["message"]["content"]
-
     async def _ask_clarification(
         self,
         *,
         query: str,
         history: list[dict[str, str]],
         clarifications: Sequence[str] | None = None,
+        on_token: TokenCallback | None = None,
     ) -> str:
-        from pathlib import Path
-
-        base = Path(__file__).with_suffix("").parent / "prompt_storage"
-        system_prompt = (base / "system_ru.txt").read_text(encoding="utf-8")
-
         extra = ""
         if clarifications:
             bullets = "\n".join(f"- {c}" for c in clarifications)
@@ -1186,17 +1174,27 @@ class RagAgent:
         )
         user_content = f"{query}\n\n{extra}{prompt_text}"
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            *history[-self._messages_limit :],
-            {"role": "user", "content": user_content},
-        ]
+        messages = self._build_messages(user_content, history)
         prompt_params = self._config.prompts.clarification
         resp = await self._chat.chat(
             messages=messages,
             **self._prompt_kwargs(prompt_params),
+            on_token=on_token,
         )
-        return resp["choices"][0]["message"]["content"]
+        return resp["choices"][0]["message"]["content"] or ""
+
+    def _build_messages(
+        self,
+        user_content: str,
+        history: list[dict[str, str]],
+        *,
+        system_extras: Sequence[str] = (),
+    ) -> list[dict[str, Any]]:
+        messages: list[dict[str, Any]] = [self._system_message]
+        messages.extend({"role": "system", "content": extra} for extra in system_extras)
+        messages.extend(history)
+        messages.append({"role": "user", "content": user_content})
+        return messages
 
     def _prompt_kwargs(self, params: PromptParams) -> dict[str, Any]:
         return {
@@ -1216,7 +1214,7 @@ class RagAgent:
 
         try:
             start = time.perf_counter()
-            embeddings = await self._kb_embeddings.embed_texts([query])
+            embeddings = await self._kb_embeddings.embed_queries([query])
         except Exception as exc:  # pragma: no cover
             logger.warning("kb-embedding-failed", reason=str(exc))
             return []
@@ -1386,16 +1384,25 @@ class RagAgent:
     async def _tool_fetch_cbr_data(
         self, invocation: ToolInvocation, context: ToolContext
     ) -> ToolResult:
-        mode = invocation.arguments.get("mode")
-        if mode not in {"key_rate", "currency", "news"}:
+        modes = invocation.arguments.get("modes") or [invocation.arguments.get("mode")]
+        modes = list(dict.fromkeys(modes))
+        if any(mode not in {"key_rate", "currency", "news"} for mode in modes):
             raise ValueError("mode must be one of key_rate|currency|news")
         payload = {
             "date": invocation.arguments.get("date"),
             "code": invocation.arguments.get("code"),
             "history": context.history,
         }
-        response = await self._cbr_client.fetch(mode=mode, payload=payload)
-        return ToolResult(content=response)
+        if len(modes) == 1:
+            response = await self._cbr_client.fetch(mode=modes[0], payload=payload)
+            return ToolResult(content=response)
+        # E.g. key rate and a currency quote in one round trip of latency.
+        responses = await self._cbr_client.fetch_many(
+            [(mode, payload) for mode in modes]
+        )
+        return ToolResult(
+            content={"status": "ok", "results": dict(zip(modes, responses))}
+        )
 
     async def _tool_fetch_finance_news(
         self, invocation: ToolInvocation, context: ToolContext
@@ -1501,7 +1508,8 @@ class RagAgent:
                 name="fetch_cbr_data",
                 description=(
                     "Получает данные Банка России: ключевая ставка, курсы валют,"
-                    " новости. Обязательно указывай mode."
+                    " новости. Обязательно указывай mode; если нужны сразу"
+                    " несколько видов данных, перечисли их в modes."
                 ),
                 parameters={
                     "type": "object",
@@ -1510,6 +1518,14 @@ class RagAgent:
                             "type": "string",
                             "enum": ["key_rate", "currency", "news"],
                         },
+                        "modes": {
+                            "type": "array",
+                            "items": {
+                                "type": "string",
+                                "enum": ["key_rate", "currency", "news"],
+                            },
+                            "description": "Несколько mode за один вызов",
+                        },
                         "date": {"type": "string", "description": "Формат YYYY-MM-DD"},
                         "code": {
                             "type": "string",
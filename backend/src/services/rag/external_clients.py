@@ -1,15 +1,74 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import datetime as dt
+import functools
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Awaitable, Callable, Hashable, Self, Sequence, TypeVar
 
 import httpx
+import orjson
+import structlog
+from lxml import etree
 
 from config import settings
 
 
+logger = structlog.get_logger(__name__)
+
+
+# CBR diffgram rows carry no namespace, so elements are matched by local name.
+# The expressions are compiled once instead of on every response.
+def _child_text(name: str) -> etree.XPath:
+    return etree.XPath(f"string(*[local-name()='{name}'])")
+
+
+# Key-rate rows with a date and a rate (or, failing that, a value). Dates and
+# values are selected from the same rows, so the two lists stay aligned.
+_KR_ROWS = (
+    "//*[local-name()='KR']"
+    "[*[local-name()='DT'][1][string()]]"
+    "[*[(local-name()='Rate' or local-name()='Value') and string()]]"
+)
+_KR_DATES = etree.XPath(f"{_KR_ROWS}/*[local-name()='DT'][1]")
+_KR_VALUES = etree.XPath(
+    f"{_KR_ROWS}/*[(local-name()='Rate' and string())"
+    " or (local-name()='Value' and string()"
+    " and not(../*[local-name()='Rate'][string()]))][1]"
+)
+_CURRENCY_ROW = etree.XPath(
+    "//*[local-name()='ValuteCursOnDate']"
+    "[translate(*[local-name()='VchCode'],"
+    " 'abcdefghijklmnopqrstuvwxyz', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ') = $code]"
+)
+_CURRENCY_VCURS = _child_text("Vcurs")
+_CURRENCY_VNOM = _child_text("Vnom")
+
+_ENVELOPE_PREFIX = (
+    b'<?xml version="1.0" encoding="utf-8"?>'
+    b'<soap:Envelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+    b'xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
+    b'xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+    b"<soap:Body>"
+)
+_ENVELOPE_SUFFIX = b"</soap:Body></soap:Envelope>"
+
+# Tavily bodies above this size (raw page content) take milliseconds to
+# decode, which is then done off the event loop; below it a thread hop costs
+# more than the decode.
+_OFFLOAD_JSON_BYTES = 256 * 1024
+
+# Constant parts of the development stubs, merged into each stub response.
+_STUB_DATE = "2024-11-17"
+_CBR_STUB_FIELDS = {"source": "cbr_stub", "warning": "Stub data - not real CBR data"}
+_TAVILY_STUB_FIELDS = {
+    "snippet": "Здесь будет краткое описание новости.",
+    "published_at": "2024-09-15",
+}
+
+
 def _now_ts() -> float:
     return time.time()
 
@@ -20,39 +79,193 @@ class CachedValue:
     expires_at: float
 
 
-class CentralBankClient:
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire ``ttl`` seconds after insertion."""
+
+    # Expired entries that are never read again are swept on this cadence
+    # instead of only being pushed out by capacity.
+    sweep_interval = 128
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self._maxsize = max(0, maxsize)
+        self._ttl = max(0, ttl)
+        self._data: OrderedDict[Hashable, CachedValue] = OrderedDict()
+        self._inserts = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> CachedValue | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= _now_ts():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not (self._ttl and self._maxsize):
+            return
+        now = _now_ts()
+        self._data[key] = CachedValue(value=value, expires_at=now + self._ttl)
+        self._data.move_to_end(key)
+
+        self._inserts += 1
+        if self._inserts % self.sweep_interval == 0:
+            expired = [k for k, v in self._data.items() if v.expires_at <= now]
+            for k in expired:
+                del self._data[k]
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+
+T = TypeVar("T")
+
+
+class _InflightCalls:
+    """Shares one running call between concurrent callers with the same key."""
+
+    def __init__(self) -> None:
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._tasks[key] = task
+            task.add_done_callback(functools.partial(self._forget, key))
+        # Shielded so one caller being cancelled does not cancel the call
+        # the others are waiting on.
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved if every caller went away.
+            task.exception()
+
+
+class _PooledHttpClient:
+    """Keeps one httpx client per instance so calls reuse keep-alive connections."""
+
+    _timeout: float
+    _client: httpx.AsyncClient | None = None
+    _http2 = False
+
+    def _http(self) -> httpx.AsyncClient:
+        # Created on first use (and again after aclose) so the pool is bound
+        # to the running event loop rather than the one active at import.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout,
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+                http2=self._http2,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class CentralBankClient(_PooledHttpClient):
     def __init__(
         self,
         *,
         base_url: str | None = None,
         timeout_seconds: float = 10.0,
         cache_ttl_seconds: int = 900,
+        cache_max_entries: int = 1024,
     ) -> None:
         self._base_url = base_url or settings.CBR_API_BASE_URL
         self._timeout = timeout_seconds
         self._cache_ttl = max(0, cache_ttl_seconds)
-        self._cache: dict[str, CachedValue] = {}
+        self._cache = TTLCache(maxsize=cache_max_entries, ttl=self._cache_ttl)
+        self._inflight = _InflightCalls()
+        self._refresh_task: asyncio.Task | None = None
+
+    def start_background_refresh(self) -> None:
+        """Keep the current key rate cached so requests never wait on CBR for it.
+
+        The rate changes a few times a year, so it is re-fetched shortly before
+        each cache expiry instead of on the first request after it.
+        """
+        if not (self._base_url and self._cache_ttl) or self._refresh_task:
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_key_rate())
+
+    async def _refresh_key_rate(self) -> None:
+        cache_key = self._cache_key("key_rate", {})
+        interval = self._cache_ttl * 0.9
+        while True:
+            try:
+                data = await self._inflight.run(
+                    cache_key, functools.partial(self._fetch_key_rate, {})
+                )
+                self._cache.set(cache_key, data)
+                delay = interval
+            except Exception:
+                logger.warning("cbr-key-rate-refresh-failed", exc_info=True)
+                delay = min(60.0, interval)
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+        await super().aclose()
+
+    @staticmethod
+    def _cache_key(mode: str, payload: dict[str, Any]) -> tuple[Any, ...]:
+        # Only these fields shape the CBR request; the rest of the payload
+        # (e.g. the chat history the agent passes along) must not split or
+        # bloat the cache. Requests default to today, so an explicit
+        # date=today shares the undated entry the background refresh warms.
+        date = payload.get("date")
+        if date == dt.date.today().isoformat():
+            date = None
+        return (mode, date, payload.get("from_date"), payload.get("code"))
 
     async def fetch(self, mode: str, payload: dict[str, Any]) -> dict[str, Any]:
-        cache_key = f"{mode}:{json.dumps(payload, sort_keys=True, ensure_ascii=False)}"
+        cache_key = self._cache_key(mode, payload)
         cached = self._cache.get(cache_key)
-        if cached and cached.expires_at > _now_ts():
+        if cached:
             return {"status": "ok", "data": cached.value, "cached": True}
 
         if not self._base_url:
             data = self._stub_response(mode, payload)
         else:
             try:
-                data = await self._call_api(mode, payload)
+                data = await self._inflight.run(
+                    cache_key, functools.partial(self._call_api, mode, payload)
+                )
             except Exception as exc:
                 data = self._stub_response(mode, payload, error=str(exc))
 
-        if self._cache_ttl:
-            self._cache[cache_key] = CachedValue(
-                value=data, expires_at=_now_ts() + self._cache_ttl
-            )
+        self._cache.set(cache_key, data)
         return {"status": "ok", "data": data, "cached": False}
 
+    async def fetch_many(
+        self, requests: Sequence[tuple[str, dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        """``fetch`` several ``(mode, payload)`` pairs concurrently, in order."""
+        return list(
+            await asyncio.gather(
+                *(self.fetch(mode, payload) for mode, payload in requests)
+            )
+        )
+
     async def _call_api(self, mode: str, payload: dict[str, Any]) -> dict[str, Any]:
         if mode == "key_rate":
             return await self._fetch_key_rate(payload)
@@ -61,12 +274,6 @@ class CentralBankClient:
         raise ValueError(f"Unsupported CBR mode: {mode}")
 
     async def _fetch_key_rate(self, payload: dict[str, Any]) -> dict[str, Any]:
-        import datetime as dt
-        import xml.etree.ElementTree as ET
-        import structlog
-
-        logger = structlog.get_logger(__name__)
-
         to_date = payload.get("date") or dt.date.today().isoformat()
         from_date = (
             payload.get("from_date")
@@ -80,53 +287,22 @@ class CentralBankClient:
             base_url=self._base_url,
         )
 
-        envelope = self._build_envelope(
+        root = await self._post_soap(
+            "KeyRate",
             body=f"""
             <KeyRate xmlns="http://web.cbr.ru/">
                 <fromDate>{from_date}</fromDate>
                 <ToDate>{to_date}</ToDate>
             </KeyRate>
-            """
+            """,
         )
-        headers = {
-            "Content-Type": "text/xml; charset=utf-8",
-            "SOAPAction": "http://web.cbr.ru/KeyRate",
-        }
-
-        async with httpx.AsyncClient(timeout=self._timeout) as client:
-            response = await client.post(
-                self._base_url, content=envelope, headers=headers
-            )
-
-        logger.debug(
-            "cbr-response-received",
-            status_code=response.status_code,
-            content_length=len(response.text),
-        )
-
-        response.raise_for_status()
-        root = ET.fromstring(response.text)
-        rates = []
-
-        for item in self._iter_elements(root, "KR"):
-            dt_text = self._child_text(item, "DT")
-            value_text = self._child_text(item, "Rate") or self._child_text(
-                item, "Value"
-            )
-            if not value_text:
-                continue
-
-            parsed_date = dt_text.split("T")[0] if dt_text else None
-            parsed_value = self._to_float(value_text)
-
-            rates.append(
-                {
-                    "date": parsed_date,
-                    "value": parsed_value,
-                }
-            )
-
-            logger.debug("cbr-rate-parsed", date=parsed_date, value=parsed_value)
+        rates = [
+            {
+                "date": date.text.split("T", 1)[0],
+                "value": self._to_float(value.text),
+            }
+            for date, value in zip(_KR_DATES(root), _KR_VALUES(root))
+        ]
 
         logger.info(
             "cbr-key-rate-success",
@@ -137,51 +313,62 @@ class CentralBankClient:
         return {"rates": rates}
 
     async def _fetch_currency(self, payload: dict[str, Any]) -> dict[str, Any]:
-        import datetime as dt
-        import xml.etree.ElementTree as ET
-
         code = (payload.get("code") or "USD").upper()
         date = payload.get("date") or dt.date.today().isoformat()
-        envelope = self._build_envelope(
+        root = await self._post_soap(
+            "GetCursOnDateXML",
             body=f"""
             <GetCursOnDateXML xmlns="http://web.cbr.ru/">
                 <On_date>{date}T00:00:00</On_date>
             </GetCursOnDateXML>
-            """
+            """,
         )
+        # The currency code is matched inside libxml2 instead of looping over
+        # every row in Python.
+        matches = _CURRENCY_ROW(root, code=code)
+        if not matches:
+            raise ValueError(f"Currency {code} not found for {date}")
+        item = matches[0]
+        value = self._to_float(_CURRENCY_VCURS(item))
+        nominal = self._to_float(_CURRENCY_VNOM(item) or "1")
+        return {
+            "currency": code,
+            "value": value / nominal if nominal else value,
+            "nominal": nominal,
+            "date": date,
+        }
+
+    async def _post_soap(self, action: str, *, body: str) -> etree._Element:
         headers = {
             "Content-Type": "text/xml; charset=utf-8",
-            "SOAPAction": "http://web.cbr.ru/GetCursOnDateXML",
+            "SOAPAction": f"http://web.cbr.ru/{action}",
         }
-        async with httpx.AsyncClient(timeout=self._timeout) as client:
-            response = await client.post(
-                self._base_url, content=envelope, headers=headers
-            )
-        response.raise_for_status()
-        root = ET.fromstring(response.text)
-        for item in self._iter_elements(root, "ValuteCursOnDate"):
-            vch_code = self._child_text(item, "VchCode").upper()
-            if vch_code != code:
-                continue
-            value = self._to_float(self._child_text(item, "Vcurs"))
-            nominal = self._to_float(self._child_text(item, "Vnom") or "1")
-            return {
-                "currency": code,
-                "value": value / nominal if nominal else value,
-                "nominal": nominal,
-                "date": date,
-            }
-        raise ValueError(f"Currency {code} not found for {date}")
-
-    def _build_envelope(self, *, body: str) -> str:
-        return (
-            '<?xml version="1.0" encoding="utf-8"?>'
-            '<soap:Envelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
-            'xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
-            'xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
-            f"<soap:Body>{body}</soap:Body>"
-            "</soap:Envelope>"
+        # The response is fed to libxml2 chunk by chunk as it arrives instead
+        # of being buffered whole and parsed afterwards.
+        parser = etree.XMLParser()
+        received = 0
+        async with self._http().stream(
+            "POST",
+            self._base_url,
+            content=self._build_envelope(body=body),
+            headers=headers,
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                parser.feed(chunk)
+
+        logger.debug(
+            "cbr-response-received",
+            action=action,
+            status_code=response.status_code,
+            content_length=received,
         )
+        return parser.close()
+
+    def _build_envelope(self, *, body: str) -> bytes:
+        # Sent as bytes so httpx does not re-encode the whole envelope.
+        return _ENVELOPE_PREFIX + body.encode() + _ENVELOPE_SUFFIX
 
     @staticmethod
     def _to_float(value: str | None) -> float:
@@ -189,24 +376,6 @@ class CentralBankClient:
             return 0.0
         return float(value.replace(",", "."))
 
-    @staticmethod
-    def _local_name(tag: str) -> str:
-        return tag.split("}", 1)[-1] if "}" in tag else tag
-
-    @classmethod
-    def _iter_elements(cls, root, tag: str):
-        target = tag
-        for elem in root.iter():
-            if cls._local_name(elem.tag) == target:
-                yield elem
-
-    @classmethod
-    def _child_text(cls, element, tag: str) -> str:
-        for child in element:
-            if cls._local_name(child.tag) == tag:
-                return child.text or ""
-        return ""
-
     def _stub_response(
         self, mode: str, payload: dict[str, Any], error: str | None = None
     ) -> dict[str, Any]:
@@ -214,10 +383,6 @@ class CentralBankClient:
         Stub response when CBR API is not configured or fails.
         NOTE: This returns fake data for development only!
         """
-        import structlog
-
-        logger = structlog.get_logger(__name__)
-
         logger.warning(
             "cbr-using-stub-data",
             mode=mode,
@@ -230,12 +395,11 @@ class CentralBankClient:
                 "rates": [
                     {
                         "value": 0.21,  # 21% - примерная текущая ставка
-                        "date": payload.get("date") or "2024-11-17",
+                        "date": payload.get("date") or _STUB_DATE,
                     }
                 ],
-                "source": "cbr_stub",
                 "error": error,
-                "warning": "Stub data - not real CBR data",
+                **_CBR_STUB_FIELDS,
             }
         if mode == "currency":
             currency = payload.get("code") or "USD"
@@ -243,10 +407,9 @@ class CentralBankClient:
                 "currency": currency,
                 "value": 100.0,  # Примерный курс
                 "nominal": 1,
-                "date": payload.get("date") or "2024-11-17",
-                "source": "cbr_stub",
+                "date": payload.get("date") or _STUB_DATE,
                 "error": error,
-                "warning": "Stub data - not real CBR data",
+                **_CBR_STUB_FIELDS,
             }
         return {
             "mode": mode,
@@ -256,7 +419,11 @@ class CentralBankClient:
         }
 
 
-class TavilyClient:
+class TavilyClient(_PooledHttpClient):
+    # Refined searches of one chat turn run concurrently; HTTP/2 multiplexes
+    # them over a single connection (ALPN falls back to HTTP/1.1).
+    _http2 = True
+
     def __init__(
         self,
         *,
@@ -264,12 +431,13 @@ class TavilyClient:
         base_url: str | None = None,
         timeout_seconds: float = 8.0,
         cache_ttl_seconds: int = 300,
+        cache_max_entries: int = 1024,
     ) -> None:
         self._api_key = api_key or settings.TAVILY_API_KEY
         self._base_url = base_url or settings.TAVILY_BASE_URL
         self._timeout = timeout_seconds
-        self._cache_ttl = max(0, cache_ttl_seconds)
-        self._cache: dict[str, CachedValue] = {}
+        self._cache = TTLCache(maxsize=cache_max_entries, ttl=cache_ttl_seconds)
+        self._inflight = _InflightCalls()
 
     async def search(
         self,
@@ -283,33 +451,42 @@ class TavilyClient:
         exclude_domains: list[str] | None = None,
         include_answer: bool = False,
     ) -> dict[str, Any]:
-        cache_key = f"{query}:{max_results}:{search_depth}:{topic}:{days}:{include_domains}:{exclude_domains}"
+        cache_key = (
+            query,
+            max_results,
+            search_depth,
+            topic,
+            days,
+            tuple(include_domains or ()),
+            tuple(exclude_domains or ()),
+        )
         cached = self._cache.get(cache_key)
-        if cached and cached.expires_at > _now_ts():
+        if cached:
             return {"status": "ok", "results": cached.value, "cached": True}
 
         if not (self._api_key and self._base_url):
             results = self._stub_results(query, max_results)
         else:
             try:
-                results = await self._call_api(
-                    query=query,
-                    max_results=max_results,
-                    search_depth=search_depth,
-                    topic=topic,
-                    days=days,
-                    include_domains=include_domains,
-                    exclude_domains=exclude_domains,
-                    include_answer=include_answer,
+                results = await self._inflight.run(
+                    cache_key,
+                    functools.partial(
+                        self._call_api,
+                        query=query,
+                        max_results=max_results,
+                        search_depth=search_depth,
+                        topic=topic,
+                        days=days,
+                        include_domains=include_domains,
+                        exclude_domains=exclude_domains,
+                        include_answer=include_answer,
+                    ),
                 )
             except Exception as exc:
                 results = self._stub_results(query, max_results)
                 return {"status": "stub", "results": results, "error": str(exc)}
 
-        if self._cache_ttl:
-            self._cache[cache_key] = CachedValue(
-                value=results, expires_at=_now_ts() + self._cache_ttl
-            )
+        self._cache.set(cache_key, results)
         return {"status": "ok", "results": results, "cached": False}
 
     async def _call_api(
@@ -345,24 +522,26 @@ class TavilyClient:
         if exclude_domains:
             payload["exclude_domains"] = exclude_domains
 
-        async with httpx.AsyncClient(timeout=self._timeout) as client:
-            response = await client.post(self._base_url, json=payload, headers=headers)
+        response = await self._http().post(
+            self._base_url, json=payload, headers=headers
+        )
         response.raise_for_status()
-        data = response.json()
+        body = response.content
+        if len(body) > _OFFLOAD_JSON_BYTES:
+            data = await asyncio.to_thread(orjson.loads, body)
+        else:
+            data = orjson.loads(body)
         return data.get("results", [])
 
     def _stub_results(self, query: str, max_results: int) -> list[dict[str, Any]]:
-        results: list[dict[str, Any]] = []
-        for idx in range(1, max_results + 1):
-            results.append(
-                {
-                    "title": f"Stub news #{idx} для '{query}'",
-                    "url": f"https://news.example.com/{idx}",
-                    "snippet": "Здесь будет краткое описание новости.",
-                    "published_at": "2024-09-15",
-                }
-            )
-        return results
+        return [
+            {
+                "title": f"Stub news #{idx} для '{query}'",
+                "url": f"https://news.example.com/{idx}",
+                **_TAVILY_STUB_FIELDS,
+            }
+            for idx in range(1, max_results + 1)
+        ]
 
 
 __all__ = ["CentralBankClient", "TavilyClient"]
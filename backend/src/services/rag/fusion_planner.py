@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Any, Sequence
 
+import orjson
+
 from services.rag.configuration import PromptParams
 from services.rag.openrouter_chat import OpenRouterChatClient
+from services.rag.prompt_registry import load_prompt
 
 
 @dataclass(frozen=True)
@@ -38,9 +39,8 @@ class FusionPlanner:
         self._chat_client = chat_client
         self._prompt_params = prompt_params
         self._history_tail = max(0, history_tail)
-        base = Path(__file__).with_suffix("").parent / "prompt_storage"
-        self._system_prompt = (base / "system_ru.txt").read_text(encoding="utf-8")
-        self._fusion_prompt = (base / "fusion_ru.txt").read_text(encoding="utf-8")
+        self._system_prompt = load_prompt("system_ru.txt")
+        self._fusion_prompt = load_prompt("fusion_ru.txt")
 
     async def plan(
         self,
@@ -59,7 +59,7 @@ class FusionPlanner:
         messages = [
             {"role": "system", "content": self._system_prompt},
             {"role": "system", "content": self._fusion_prompt},
-            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+            {"role": "user", "content": orjson.dumps(payload).decode()},
         ]
         response = await self._chat_client.chat(
             messages=messages,
@@ -68,8 +68,8 @@ class FusionPlanner:
         )
         content = response["choices"][0]["message"]["content"]
         try:
-            data = json.loads(content)
-        except json.JSONDecodeError:
+            data = orjson.loads(content)
+        except orjson.JSONDecodeError:
             data = {}
         refinements = _ensure_list(data.get("refinements"))
         subqueries = _ensure_list(data.get("subqueries"))
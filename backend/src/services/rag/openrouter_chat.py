@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Any, Literal
+from typing import Any, Awaitable, Callable, Literal
 
 import httpx
+import orjson
 
 from config import settings
 
@@ -10,6 +11,37 @@ from config import settings
 Role = Literal["system", "user", "assistant", "tool"]
 
 
+class _JsonValueEnd:
+    """Finds where the first top-level JSON object/array in a stream ends."""
+
+    __slots__ = ("_depth", "_in_string", "_escaped")
+
+    def __init__(self) -> None:
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> int:
+        """Return the offset in ``text`` just past the closing bracket, or -1."""
+        for index, char in enumerate(text):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{" or char == "[":
+                self._depth += 1
+            elif (char == "}" or char == "]") and self._depth:
+                self._depth -= 1
+                if not self._depth:
+                    return index + 1
+        return -1
+
+
 class OpenRouterChatClient:
     DEFAULT_BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
 
@@ -25,6 +57,7 @@ class OpenRouterChatClient:
         default_temperature: float | None = None,
         default_top_p: float | None = None,
         default_max_tokens: int | None = None,
+        prompt_cache: bool = False,
     ) -> None:
         self._api_key = api_key
         self._model = model
@@ -35,27 +68,22 @@ class OpenRouterChatClient:
         self._default_temperature = default_temperature
         self._default_top_p = default_top_p
         self._default_max_tokens = default_max_tokens
+        self._prompt_cache = prompt_cache
 
     @classmethod
     def from_settings(cls) -> "OpenRouterChatClient":
+        openrouter = settings.openrouter
         return cls(
-            api_key=getattr(settings, "OPENROUTER_API_KEY", None),
-            model=getattr(
-                settings, "OPENROUTER_CHAT_MODEL", "qwen/qwen3-235b-a22b-2507"
-            ),
-            base_url=getattr(settings, "OPENROUTER_CHAT_URL", None),
-            referer=getattr(settings, "OPENROUTER_HTTP_REFERER", None),
-            title=getattr(settings, "OPENROUTER_APP_TITLE", None) or settings.APP_NAME,
-            timeout_seconds=float(
-                getattr(settings, "OPENROUTER_CHAT_TIMEOUT_SECONDS", 60.0)
-            ),
-            default_temperature=getattr(
-                settings, "OPENROUTER_CHAT_DEFAULT_TEMPERATURE", None
-            ),
-            default_top_p=getattr(settings, "OPENROUTER_CHAT_DEFAULT_TOP_P", None),
-            default_max_tokens=getattr(
-                settings, "OPENROUTER_CHAT_DEFAULT_MAX_TOKENS", None
-            ),
+            api_key=openrouter.OPENROUTER_API_KEY,
+            model=openrouter.OPENROUTER_CHAT_MODEL,
+            base_url=openrouter.OPENROUTER_CHAT_URL,
+            referer=openrouter.OPENROUTER_HTTP_REFERER,
+            title=openrouter.OPENROUTER_APP_TITLE or settings.APP_NAME,
+            timeout_seconds=float(openrouter.OPENROUTER_CHAT_TIMEOUT_SECONDS),
+            default_temperature=openrouter.OPENROUTER_CHAT_DEFAULT_TEMPERATURE,
+            default_top_p=openrouter.OPENROUTER_CHAT_DEFAULT_TOP_P,
+            default_max_tokens=openrouter.OPENROUTER_CHAT_DEFAULT_MAX_TOKENS,
+            prompt_cache=openrouter.OPENROUTER_CHAT_PROMPT_CACHE,
         )
 
     async def chat(
@@ -70,7 +98,21 @@ class OpenRouterChatClient:
         frequency_penalty: float | None = None,
         presence_penalty: float | None = None,
         response_format: dict[str, Any] | None = None,
+        on_token: Callable[[str], Awaitable[None]] | None = None,
+        stop_after_json: bool = False,
     ) -> dict[str, Any]:
+        """Send a chat completion request.
+
+        With ``on_token`` the completion is streamed: each content delta is
+        passed to it as it arrives, and the assembled message is returned in
+        the same shape as a non-streamed response.
+
+        ``stop_after_json`` also streams, and stops reading as soon as the
+        first top-level JSON value in the content is closed, so the caller
+        does not wait for anything the model decodes after it.
+        """
+        if self._prompt_cache:
+            messages = self._mark_cached_prefix(messages)
         payload: dict[str, Any] = {
             "model": self._model,
             "messages": messages,
@@ -108,6 +150,105 @@ class OpenRouterChatClient:
             headers["X-Title"] = self._title
 
         async with httpx.AsyncClient(timeout=self._timeout_seconds) as client:
+            if on_token is not None or stop_after_json:
+                payload["stream"] = True
+                async with client.stream(
+                    "POST", self._base_url, json=payload, headers=headers
+                ) as response:
+                    response.raise_for_status()
+                    return await self._read_stream(
+                        response, on_token, stop_after_json=stop_after_json
+                    )
             response = await client.post(self._base_url, json=payload, headers=headers)
         response.raise_for_status()
         return response.json()
+
+    @staticmethod
+    async def _read_stream(
+        response: httpx.Response,
+        on_token: Callable[[str], Awaitable[None]] | None,
+        *,
+        stop_after_json: bool = False,
+    ) -> dict[str, Any]:
+        role = "assistant"
+        content_parts: list[str] = []
+        tool_calls: dict[int, dict[str, Any]] = {}
+        json_end = _JsonValueEnd() if stop_after_json else None
+        done = False
+
+        async for line in response.aiter_lines():
+            # SSE: "data: {...}" frames, blank separators and ": comment"
+            # keep-alives, terminated by "data: [DONE]".
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = orjson.loads(data)
+            if "error" in chunk:
+                raise RuntimeError(f"OpenRouter stream error: {chunk['error']}")
+
+            for choice in chunk.get("choices") or []:
+                delta = choice.get("delta") or {}
+                role = delta.get("role") or role
+                if text := delta.get("content"):
+                    if json_end is not None:
+                        end = json_end.feed(text)
+                        if end >= 0:
+                            text = text[:end]
+                            done = True
+                    content_parts.append(text)
+                    if on_token is not None:
+                        await on_token(text)
+                # Tool calls arrive in fragments keyed by index: id and name
+                # once, the JSON arguments spread over many deltas.
+                for fragment in delta.get("tool_calls") or []:
+                    call = tool_calls.setdefault(
+                        fragment.get("index", 0),
+                        {
+                            "id": None,
+                            "type": "function",
+                            "function": {"name": "", "arguments": ""},
+                        },
+                    )
+                    if fragment.get("id"):
+                        call["id"] = fragment["id"]
+                    function = fragment.get("function") or {}
+                    if function.get("name"):
+                        call["function"]["name"] = function["name"]
+                    if function.get("arguments"):
+                        call["function"]["arguments"] += function["arguments"]
+            if done:
+                # Leaving the stream context closes the connection, which
+                # aborts the rest of the generation.
+                break
+
+        message = {
+            "role": role,
+            "content": "".join(content_parts) or None,
+            "tool_calls": [tool_calls[index] for index in sorted(tool_calls)],
+        }
+        return {"choices": [{"message": message}]}
+
+    @staticmethod
+    def _mark_cached_prefix(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # Every call starts with the static system_ru prompt; dynamic
+        # guidance, history and the query follow it, so the first message is
+        # the stable prefix worth a cache breakpoint.
+        if not messages:
+            return messages
+        first = messages[0]
+        content = first.get("content")
+        if first.get("role") != "system" or not isinstance(content, str):
+            return messages
+        marked = {
+            **first,
+            "content": [
+                {
+                    "type": "text",
+                    "text": content,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+        }
+        return [marked, *messages[1:]]
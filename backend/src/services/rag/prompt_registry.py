@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 from pathlib import Path
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -31,7 +32,9 @@ def _prompts_dir() -> Path:
     return Path(__file__).with_suffix("").parent / "prompt_storage"
 
 
-def _load_prompt_text(filename: str) -> str:
+@functools.cache
+def load_prompt(filename: str) -> str:
+    """Return a prompt_storage file, read from disk once per process."""
     path = _prompts_dir() / filename
     return path.read_text(encoding="utf-8")
 
@@ -43,7 +46,7 @@ async def seed_prompts(session: AsyncSession) -> list[Prompt]:
         title = str(definition["title"])
         filename = str(definition["filename"])
         params = definition.get("params") or {}
-        content = _load_prompt_text(filename)
+        content = load_prompt(filename)
         prompt = await repo.upsert_prompt(title=title, text=content, params=params)
         seeded.append(prompt)
     return seeded
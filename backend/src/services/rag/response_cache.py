@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import math
+import operator
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+import structlog
+
+from services.embeddings.openrouter import OpenRouterEmbeddingClient
+
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    vector: list[float]
+    value: Any
+    expires_at: float
+
+
+class SemanticResponseCache:
+    """In-process cache of agent answers keyed by query-embedding similarity.
+
+    Entries are grouped by a caller-supplied scope (user, selected documents,
+    chat state), so a hit can only return an answer produced for the same
+    context; within a scope, the stored query whose embedding has cosine
+    similarity >= ``threshold`` with the new one wins.
+    """
+
+    def __init__(
+        self,
+        *,
+        embedder: OpenRouterEmbeddingClient,
+        threshold: float = 0.93,
+        ttl_seconds: int = 300,
+        max_entries: int = 1024,
+        max_entries_per_scope: int = 32,
+    ) -> None:
+        self._embedder = embedder
+        self._threshold = threshold
+        self._ttl = max(0, ttl_seconds)
+        self._max_entries = max(0, max_entries)
+        self._max_per_scope = max(1, max_entries_per_scope)
+        self._scopes: OrderedDict[Hashable, list[_CacheEntry]] = OrderedDict()
+        self._size = 0
+
+    @property
+    def is_enabled(self) -> bool:
+        return bool(self._ttl and self._max_entries and self._embedder.is_enabled)
+
+    async def embed(self, query: str) -> list[float] | None:
+        """Embed ``query`` for ``lookup``/``store``; None when caching is off."""
+        if not self.is_enabled:
+            return None
+        try:
+            embeddings = await self._embedder.embed_queries([query])
+        except Exception:
+            logger.warning("semantic-cache-embed-failed", exc_info=True)
+            return None
+        if not embeddings:
+            return None
+        return self._normalize(embeddings[0])
+
+    def lookup(self, scope: Hashable, vector: list[float]) -> tuple[Any | None, float]:
+        """Return ``(value, similarity)`` for the best live match in ``scope``.
+
+        ``value`` is None on a miss.
+        """
+        entries = self._scopes.get(scope)
+        if not entries:
+            return None, 0.0
+
+        now = time.monotonic()
+        live = [entry for entry in entries if entry.expires_at > now]
+        self._size -= len(entries) - len(live)
+        if not live:
+            del self._scopes[scope]
+            return None, 0.0
+        self._scopes[scope] = live
+        self._scopes.move_to_end(scope)
+
+        best: _CacheEntry | None = None
+        best_score = -1.0
+        for entry in live:
+            # Vectors are unit length, so the dot product is the cosine.
+            score = sum(map(operator.mul, vector, entry.vector))
+            if score > best_score:
+                best, best_score = entry, score
+        if best is None or best_score < self._threshold:
+            return None, best_score
+        return best.value, best_score
+
+    def store(self, scope: Hashable, vector: list[float], value: Any) -> None:
+        if not self.is_enabled:
+            return
+        entries = self._scopes.setdefault(scope, [])
+        entries.append(
+            _CacheEntry(
+                vector=vector, value=value, expires_at=time.monotonic() + self._ttl
+            )
+        )
+        self._size += 1
+        if len(entries) > self._max_per_scope:
+            entries.pop(0)
+            self._size -= 1
+        self._scopes.move_to_end(scope)
+
+        while self._size > self._max_entries and self._scopes:
+            _, evicted = self._scopes.popitem(last=False)
+            self._size -= len(evicted)
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> list[float]:
+        norm = math.sqrt(sum(map(operator.mul, vector, vector)))
+        if not norm:
+            return list(vector)
+        return [value / norm for value in vector]
+
+
+__all__ = ["SemanticResponseCache"]
@@ -62,22 +62,21 @@ class MinioStorageClient:
 
     @classmethod
     def from_settings(cls) -> "MinioStorageClient":
-        endpoint, secure = _parse_endpoint(
-            settings.MINIO_ENDPOINT, settings.MINIO_USE_SSL
-        )
+        minio = settings.minio
+        endpoint, secure = _parse_endpoint(minio.MINIO_ENDPOINT, minio.MINIO_USE_SSL)
         public_endpoint = (
-            settings.MINIO_PUBLIC_ENDPOINT
-            or settings.MINIO_ENDPOINT
+            minio.MINIO_PUBLIC_ENDPOINT
+            or minio.MINIO_ENDPOINT
             or f"http{'s' if secure else ''}://{endpoint}"
         )
 
         config = MinioConfig(
             endpoint=endpoint,
             secure=secure,
-            access_key=settings.MINIO_ACCESS_KEY or "",
-            secret_key=settings.MINIO_SECRET_KEY or "",
-            bucket_name=settings.MINIO_BUCKET_NAME,
-            region=settings.MINIO_REGION,
+            access_key=minio.MINIO_ACCESS_KEY or "",
+            secret_key=minio.MINIO_SECRET_KEY or "",
+            bucket_name=minio.MINIO_BUCKET_NAME,
+            region=minio.MINIO_REGION,
             public_endpoint=public_endpoint,
         )
         return cls(config)
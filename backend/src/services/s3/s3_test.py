@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import mimetypes
+from functools import lru_cache
 
 import structlog
 
@@ -11,7 +12,10 @@ from .client import MinioStorageClient
 
 logger = structlog.get_logger(__name__)
 
-storage_client = MinioStorageClient.from_settings()
+
+@lru_cache(maxsize=1)
+def get_storage_client() -> MinioStorageClient:
+    return MinioStorageClient.from_settings()
 
 
 async def upload_to_s3(file: bytes, filename: str, user: User) -> str:
@@ -21,18 +25,18 @@ async def upload_to_s3(file: bytes, filename: str, user: User) -> str:
     content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
 
     try:
-        return await storage_client.upload_bytes(
+        return await get_storage_client().upload_bytes(
             data=file,
             filename=filename,
             user_id=user.user_id,
             content_type=content_type,
             metadata={"username": user.username, "email": user.email},
         )
-    except Exception as exc:
+    except Exception:
         logger.error(
             "minio-upload-failed",
             filename=filename,
             user_id=user.user_id,
-            reason=str(exc),
+            exc_info=True,
         )
         raise
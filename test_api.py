@@ -316,7 +316,29 @@ async def test_api():
             "Расскажи последние финансовые новости о ключевой ставке ЦБ РФ за последние недели.",
             [],
         )
-        
+
+        print("\n🔀 Step 14: Switching between two chats...")
+        second_chat_response = await client.post(
+            f"{API_PREFIX}/chat",
+            headers=headers,
+            json=chat_data
+        )
+        if second_chat_response.status_code == 201:
+            chat_ids = [chat_id, second_chat_response.json().get("chat_id")]
+            # Posting to a chat makes it the user's only active one; each switch
+            # must succeed regardless of the rows' physical order.
+            for attempt in range(4):
+                target_chat_id = chat_ids[attempt % 2]
+                switch_response = await client.post(
+                    f"{API_PREFIX}/chat/{target_chat_id}/message",
+                    headers=headers,
+                    json={"content": "Привет!", "documents_ids": []},
+                )
+                status = "✅" if switch_response.status_code == 200 else "❌"
+                print(f"{status} Message to chat {target_chat_id}: {switch_response.status_code}")
+        else:
+            print(f"⚠️  Second chat creation failed: {second_chat_response.status_code}")
+
         print("\n" + "=" * 60)
         print("✅ Testing completed!")
         print("=" * 60)